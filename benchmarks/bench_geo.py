@@ -0,0 +1,96 @@
+# Times nearest-location lookups of geo_index.GridIndex on generated point sets of
+# several sizes and checks every answer against a brute-force scan.
+# Points are scattered around New York; queries are drawn from the same area, from
+# a wider one (sparse outskirts) and from anywhere on the globe.
+#
+# Usage: python benchmarks/bench_geo.py [--sizes 10000,100000,300000] [--queries 2000] [--output geo.json]
+
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench_pipeline import git_commit
+from geo_index import EARTH_RADIUS_KM, GridIndex, _surface_points
+
+
+def brute_force_km(points, latitude, longitude):
+    """
+    Distance in km from the coordinates to the closest of `points` (as returned by `_surface_points`).
+    """
+    query = _surface_points([latitude], [longitude])[0]
+    chord = math.sqrt(((points - query) ** 2).sum(axis=1).min())
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / (2 * EARTH_RADIUS_KM)))
+
+
+def run_size(size, query_count, rng):
+    """
+    Builds an index of `size` points and returns its build time and per-query-set lookup latencies.
+    """
+    latitudes = 40.7 + rng.normal(0, 0.15, size)
+    longitudes = -73.95 + rng.normal(0, 0.2, size)
+    start = time.perf_counter()
+    index = GridIndex([f"loc_{i}" for i in range(size)], latitudes, longitudes)
+    result = {"size": size, "build_s": round(time.perf_counter() - start, 3), "cell_km": round(index.cell_km, 3), "query_sets": {}}
+    points = _surface_points(latitudes, longitudes)
+
+    query_sets = {
+        "local": np.column_stack((40.7 + rng.normal(0, 0.15, query_count), -73.95 + rng.normal(0, 0.2, query_count))),
+        "outskirts": np.column_stack((40.7 + rng.normal(0, 0.4, query_count), -73.95 + rng.normal(0, 0.5, query_count))),
+        "global": np.column_stack((rng.uniform(-60, 60, query_count // 10), rng.uniform(-180, 180, query_count // 10))),
+    }
+    for name, queries in query_sets.items():
+        queries = queries.tolist()
+        timings = []
+        answers = []
+        for latitude, longitude in queries:
+            start = time.perf_counter()
+            answers.append(index.nearest(latitude, longitude))
+            timings.append(time.perf_counter() - start)
+        mismatches = sum(abs(km - brute_force_km(points, *query)) > 1e-6 for query, (_, km) in zip(queries, answers))
+        timings.sort()
+        result["query_sets"][name] = {
+            "queries": len(queries),
+            "p50_us": round(timings[len(timings) // 2] * 1e6, 1),
+            "p99_us": round(timings[min(len(timings) - 1, int(0.99 * len(timings)))] * 1e6, 1),
+            "mean_us": round(sum(timings) / len(timings) * 1e6, 1),
+            "mismatches": mismatches,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nearest-location lookups of the grid index.")
+    parser.add_argument("--sizes", default="10000,100000,300000", help="Comma-separated numbers of indexed points.")
+    parser.add_argument("--queries", type=int, default=2000, help="Queries per local/outskirts set (a tenth for global).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    report = {"commit": git_commit(), "runs": []}
+    for size in (int(size) for size in args.sizes.split(",")):
+        run = run_size(size, args.queries, rng)
+        report["runs"].append(run)
+        print(f"{size} points: built in {run['build_s']} s (cells of {run['cell_km']} km)")
+        for name, stats in run["query_sets"].items():
+            print(f"  {name:>9}: p50 {stats['p50_us']} us, p99 {stats['p99_us']} us, mean {stats['mean_us']} us, {stats['mismatches']} mismatches")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if any(stats["mismatches"] for run in report["runs"] for stats in run["query_sets"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Compares the two ways of asking the LLM for the intent of a query:
+#   - "json": the long free-text SYSTEM_MESSAGE, hoping for a bare JSON answer,
+#   - "tool": the short static TOOL_SYSTEM_MESSAGE plus TRAVEL_TOOL as a tool schema.
+# For the same queries it reports prompt and completion tokens (as counted by the
+# server), the static prompt prefix the server can keep cached, failed parses and latency.
+# Against the local stub, failed parses only reflect the stub's configured error rates
+# (--malformed-rate for free text, --tool-malformed-rate for tool arguments); they are
+# printed next to the rate that produced them. Use --llm-url for measured figures.
+#
+# Usage: python benchmarks/bench_intent_modes.py [--queries 100]
+#                                                [--llm-url http://127.0.0.1:1234/v1 | --malformed-rate 0.05 --tool-malformed-rate 0.02]
+
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import demo
+from bench_pipeline import git_commit, start_stub_thread, summarize
+from intent_cache import IntentCache
+from load_test import LLM_TEMPLATES, synthesize_queries
+
+MODES = ["json", "tool"]
+
+
+def prefix_tokens():
+    """
+    Returns the prompt tokens of a request with an empty user message: the static part of every prompt.
+    """
+    response = demo.get_client().chat.completions.create(**demo.intent_request(""))
+    return response.usage.prompt_tokens if response.usage else None
+
+
+def run_mode(mode, queries):
+    """
+    Extracts the intent of every query with the LLM in the given mode and returns the report for that mode.
+    """
+    demo.INTENT_MODE = mode
+    demo.intent_cache = IntentCache()
+    demo.metrics.reset()
+    timings = []
+    for user_input in queries:
+        start = time.perf_counter()
+        demo.extract_intent(user_input)
+        timings.append(time.perf_counter() - start)
+
+    counters = dict(demo.metrics.counters)
+    calls = counters.get("llm_calls", 0)
+    return {
+        **summarize(mode, timings),
+        "llm_calls": calls,
+        "prefix_tokens": prefix_tokens(),
+        "prompt_tokens_per_call": round(counters.get("prompt_tokens", 0) / calls, 1) if calls else None,
+        "completion_tokens_per_call": round(counters.get("completion_tokens", 0) / calls, 1) if calls else None,
+        "failed_parses": counters.get("parse_failures", 0),
+        "failed_parse_rate": round(counters.get("parse_failures", 0) / calls, 4) if calls else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Free-text JSON vs tool-calling intent extraction.")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--data-dir", default=REPO_ROOT, help="Directory of travel_data.csv (or travel_data.store).")
+    parser.add_argument("--llm-url", help="OpenAI-compatible endpoint; a local stub is started when omitted.")
+    parser.add_argument("--model", default=demo.MODEL)
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="Share of free-text stub answers that are not valid JSON.")
+    parser.add_argument("--tool-malformed-rate", type=float, default=0.0, help="Share of stub tool call arguments that are not valid JSON.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    demo.LIVE_UPDATES = False
+    # One model for both modes, so failed parses are not hidden by escalations
+    demo.ROUTE_MODELS = False
+    demo.MODEL = args.model
+    stub_rates = None if args.llm_url else {"json": args.malformed_rate, "tool": args.tool_malformed_rate}
+    demo.LM_STUDIO_URL = args.llm_url or start_stub_thread(
+        malformed_rate=args.malformed_rate, tool_malformed_rate=args.tool_malformed_rate, seed=args.seed,
+    )
+    demo.client = None
+    demo.path = args.data_dir + os.sep
+    demo.load_data()
+    demo.metrics.enabled = True
+
+    # Only phrasings the fast path leaves to the LLM
+    queries = synthesize_queries(demo.od_index.origins, args.queries, 1.0, random.Random(args.seed))
+    assert all(any(template.split("{")[0] in query for template in LLM_TEMPLATES) for query in queries)
+
+    report = {"commit": git_commit(), "llm_url": demo.LM_STUDIO_URL, "model": demo.MODEL, "stub_malformed_rates": stub_rates, "modes": {}}
+    for mode in MODES:
+        result = run_mode(mode, queries)
+        report["modes"][mode] = result
+        # Stub parse failures are injected, not measured: show the rate behind them
+        injected = f" (stub malformed rate {stub_rates[mode]:.0%})" if stub_rates else ""
+        print(
+            f"{mode:>4}: {result['prompt_tokens_per_call']} prompt tokens/call ({result['prefix_tokens']} static prefix), "
+            f"{result['completion_tokens_per_call']} completion tokens/call, {result['failed_parses']} failed parses{injected}, "
+            f"p50 {result['p50_ms']} ms"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# Latency and throughput benchmark for the recommendation pipeline.
+# For each dataset size (generated with the local_doc.py generator) it times:
+#   - location resolving with a cold cache (`LocationResolver.resolve`, against the demos' original
+#     `fuzzy_match` as a baseline) and `fetch_recommended_mode` on misspelled names (micro-benchmarks),
+#   - whole chat turns (`answer_query`, streamed and not) against the local LM Studio stub,
+#     with a configurable model latency (end-to-end), broken down per stage with metrics.py.
+# Results are printed and can be written as JSON, to compare p50/p99 across commits.
+#
+# Usage: python benchmarks/bench_pipeline.py [--sizes 4,50,200] [--latency 0.05] [--output pipeline.json]
+
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import demo
+from intent_cache import IntentCache
+from lmstudio_stub import start_stub
+from local_doc import write_travel_data
+from location_resolver import MATCH_THRESHOLD
+
+PRIORITIES = ["lowest_cost", "minimal_walking", "shortest_time", "least_environmental_cost"]
+
+
+def summarize(name, timings, **details):
+    """
+    Returns the result entry of a case from its per-call timings (in seconds).
+    """
+    ordered = sorted(timings)
+    return {
+        "name": name,
+        **details,
+        "calls": len(ordered),
+        "p50_ms": round(ordered[int(0.50 * (len(ordered) - 1))] * 1000, 4),
+        "p99_ms": round(ordered[int(0.99 * (len(ordered) - 1))] * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "throughput_per_s": round(len(ordered) / sum(ordered), 2) if sum(ordered) else None,
+    }
+
+
+def time_calls(function, arguments):
+    """
+    Calls `function(*args)` for each entry of `arguments` and returns the wall time of every call.
+    """
+    timings = []
+    for args in arguments:
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def fuzzy_match_baseline(input_location, available_locations):
+    """
+    The demos' original `fuzzy_match`: scores every location with fuzzywuzzy, without index or cache.
+    """
+    from fuzzywuzzy import process
+
+    match, score = process.extractOne(input_location, available_locations)
+    return match if score > MATCH_THRESHOLD else None
+
+
+def resolve_cold(resolver, input_location):
+    """
+    Resolves the input with an empty cache, as for a location typed for the first time.
+    """
+    resolver.cache_clear()
+    return resolver.resolve(input_location)
+
+
+def misspell(name, rng):
+    """
+    Returns the location name as a user might type it: lower case, spaces, and one character dropped.
+    """
+    text = name.replace("_", " ").lower()
+    drop = rng.randrange(len(text))
+    return text[:drop] + text[drop + 1:]
+
+
+def load_dataset(data_dir, n_locations, seed):
+    """
+    Generates a dataset of `n_locations` locations and makes `demo` load it.
+    Returns the number of rows.
+    """
+    csv_path = os.path.join(data_dir, "travel_data.csv")
+    write_travel_data(csv_path, n_locations=n_locations, seed=seed)
+    demo.path = data_dir + os.sep
+    demo.od_index = None
+    demo.intent_cache = IntentCache()
+    demo.load_data()
+    return len(demo.df)
+
+
+def start_stub_thread(**options):
+    """
+    Runs the LM Studio stub on a free port in a background thread and returns its base URL.
+    """
+    loop = asyncio.new_event_loop()
+    server, _ = loop.run_until_complete(start_stub(port=0, **options))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1"
+
+
+def run_size(n_locations, args, rng):
+    """
+    Runs every case on one dataset size and returns their result entries.
+    """
+    rows = load_dataset(args.data_dir, n_locations, args.seed)
+    locations = demo.od_index.origins
+    details = {"locations": len(locations), "rows": rows}
+    print(f"\n{len(locations)} locations, {rows} rows")
+
+    queries = [
+        (misspell(rng.choice(locations), rng), misspell(rng.choice(locations), rng), {"priority": rng.choice(PRIORITIES)})
+        for _ in range(args.iterations)
+    ]
+    results = [
+        summarize("fuzzy_match_baseline", time_calls(fuzzy_match_baseline, [(origin, locations) for origin, _, _ in queries]), **details),
+        summarize("resolve_cold", time_calls(resolve_cold, [(demo.origin_resolver, origin) for origin, _, _ in queries]), **details),
+        summarize("fetch_recommended_mode", time_calls(demo.fetch_recommended_mode, queries), **details),
+    ]
+
+    # Chat turns whose intent needs the LLM (no priority keyword, so the fast path cannot answer)
+    turns = [(f"How do I get from {origin} to {destination}?",) for origin, destination, _ in queries[:args.e2e_queries]]
+    for stream in (False, True):
+        demo.STREAM_INTENT = stream
+        # Start every run cold: no cached intents or location matches
+        demo.intent_cache = IntentCache()
+        demo.origin_resolver.cache_clear()
+        demo.destination_resolver.cache_clear()
+        demo.metrics.reset()
+        demo.metrics.enabled = True
+        timings = time_calls(demo.answer_query, turns)
+        demo.metrics.enabled = False
+        name = "chat_streaming" if stream else "chat"
+        results.append(summarize(name, timings, **details, llm_latency_s=args.latency, stages=demo.metrics.summary()))
+
+    for result in results:
+        print(f"  {result['name']:<24} p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  {result['throughput_per_s']} calls/s")
+    return results
+
+
+def git_commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+        return output.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency/throughput benchmark of the recommendation pipeline.")
+    parser.add_argument("--sizes", default="4,50,200", help="Comma-separated numbers of locations.")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per micro-benchmark.")
+    parser.add_argument("--e2e-queries", type=int, default=50, help="Chat turns per end-to-end run.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub model latency before the first token, in seconds.")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="Stub delay between streamed chunks, in seconds.")
+    parser.add_argument("--seed", type=int, default=1024)
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    demo.LIVE_UPDATES = False
+    demo.LM_STUDIO_URL = start_stub_thread(latency=args.latency, token_delay=args.token_delay)
+    demo.client = None
+    rng = random.Random(args.seed)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory() as data_dir:
+        args.data_dir = data_dir
+        for n_locations in (int(size) for size in args.sizes.split(",")):
+            results["cases"].extend(run_size(n_locations, args, rng))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Compares adaptive model routing (small model first, large model on failed validation)
+# with always asking the large model. The local stub plays both models, each with its
+# own latency and error rates, so the trade-off can be explored offline; point
+# --llm-url at LM Studio (with both models loaded) for real figures.
+#
+# Usage: python benchmarks/bench_routing.py [--queries 200] [--small-latency 0.1] [--large-latency 0.8]
+#                                           [--small-malformed-rate 0.1] [--small-null-rate 0.05]
+
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import demo
+from bench_pipeline import git_commit, start_stub_thread, summarize
+from intent_cache import IntentCache
+from load_test import synthesize_queries
+
+
+def run_setup(name, route, queries):
+    """
+    Answers every query with or without routing and returns the report for that setup.
+    """
+    demo.ROUTE_MODELS = route
+    demo.model_router = None
+    demo.intent_cache = IntentCache()
+    demo.origin_resolver.cache_clear()
+    demo.destination_resolver.cache_clear()
+
+    timings = []
+    errors = 0
+    for user_input in queries:
+        start = time.perf_counter()
+        _, result = demo.answer_query(user_input)
+        timings.append(time.perf_counter() - start)
+        errors += result["status"] != "success"
+    return {**summarize(name, timings), "error_rate": round(errors / len(queries), 4), "routing": demo.get_router().stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive small/large model routing vs the large model only.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--data-dir", default=REPO_ROOT, help="Directory of travel_data.csv (or travel_data.store).")
+    parser.add_argument("--llm-url", help="OpenAI-compatible endpoint; a local stub is started when omitted.")
+    parser.add_argument("--small-model", default=demo.SMALL_MODEL)
+    parser.add_argument("--large-model", default=demo.MODEL)
+    parser.add_argument("--small-latency", type=float, default=0.1, help="Stub latency of the small model, in seconds.")
+    parser.add_argument("--large-latency", type=float, default=0.8, help="Stub latency of the large model, in seconds.")
+    parser.add_argument("--small-malformed-rate", type=float, default=0.1, help="Share of invalid JSON answers of the small model.")
+    parser.add_argument("--small-null-rate", type=float, default=0.05, help="Share of small-model answers with a null field.")
+    parser.add_argument("--large-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--large-null-rate", type=float, default=0.0)
+    parser.add_argument("--no-stream", action="store_true", help="Wait for the whole LLM answer (STREAM_INTENT = False).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    demo.LIVE_UPDATES = False
+    demo.STREAM_INTENT = not args.no_stream
+    demo.SMALL_MODEL = args.small_model
+    demo.MODEL = args.large_model
+    profiles = {
+        args.small_model: {"latency": args.small_latency, "malformed_rate": args.small_malformed_rate, "null_rate": args.small_null_rate},
+        args.large_model: {"latency": args.large_latency, "malformed_rate": args.large_malformed_rate, "null_rate": args.large_null_rate},
+    }
+    demo.LM_STUDIO_URL = args.llm_url or start_stub_thread(profiles=profiles, token_delay=0.002, seed=args.seed)
+    demo.client = None
+    demo.path = args.data_dir + os.sep
+    demo.load_data()
+
+    # Only phrasings the fast path leaves to the LLM
+    queries = synthesize_queries(demo.od_index.origins, args.queries, 1.0, random.Random(args.seed))
+
+    report = {"commit": git_commit(), "llm_url": demo.LM_STUDIO_URL, "stub_profiles": None if args.llm_url else profiles, "setups": []}
+    for name, route in [("large_only", False), ("routed", True)]:
+        result = run_setup(name, route, queries)
+        report["setups"].append(result)
+        print(
+            f"{name:>10}: p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, {result['error_rate']:.1%} errors, "
+            f"escalation rate {result['routing']['escalation_rate']:.1%}"
+        )
+        for model, model_stats in result["routing"]["models"].items():
+            print(f"{'':>12}{model}: {model_stats['calls']} calls, mean {model_stats['mean_ms']} ms, rejected {model_stats['failures']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
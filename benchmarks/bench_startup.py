@@ -0,0 +1,70 @@
+# Cold-start benchmark for the demo entry points.
+# Each module is imported in a fresh interpreter, several times, and the median
+# import time (on top of the bare interpreter start) is compared to a budget.
+# The script exits with status 1 when a module is over budget, so it can gate CI.
+#
+# Usage: python benchmarks/bench_startup.py [--budget 0.1] [--runs 7] [--output startup.json]
+
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["demo", "demo_basic"]
+# Importing any of these at startup defeats lazy loading
+HEAVY_MODULES = ["pandas", "numpy", "fuzzywuzzy", "openai"]
+
+
+def time_command(code, runs):
+    """
+    Returns the median wall time, in seconds, of running `python -c code` in a new process.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def heavy_imports(module):
+    """
+    Returns the heavy third-party modules loaded as a side effect of importing `module`.
+    """
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+    return [name for name in output.strip().split(",") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check for the demo entry points.")
+    parser.add_argument("--budget", type=float, default=0.1, help="Maximum import time in seconds.")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    baseline = time_command("pass", args.runs)
+    results = {"baseline_seconds": round(baseline, 4), "budget_seconds": args.budget, "modules": {}}
+    failed = False
+    for module in MODULES:
+        import_time = max(0.0, time_command(f"import {module}", args.runs) - baseline)
+        heavy = heavy_imports(module)
+        ok = import_time <= args.budget and not heavy
+        failed |= not ok
+        results["modules"][module] = {"import_seconds": round(import_time, 4), "heavy_imports": heavy, "ok": ok}
+        print(f"{module}: {import_time * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)"
+              + (f", eagerly imports {', '.join(heavy)}" if heavy else "") + ("" if ok else "  <-- FAIL"))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# Open-loop load generator for the recommender.
+# Queries are replayed from a log (one query per line) or synthesized from the
+# location vocabulary of travel_data.csv, and sent at a fixed arrival rate whether
+# or not earlier ones have finished, so queueing shows up in the latencies instead
+# of silently lowering the load. Every query runs the `chat_with_llm` code path
+# (`answer_query` then `format_answer`) against LM Studio or a local stub.
+#
+# Usage: python benchmarks/load_test.py [--rates 5,10,20] [--duration 10] [--log queries.txt]
+#                                       [--llm-url http://127.0.0.1:1234/v1 | --latency 0.3 --malformed-rate 0.05]
+
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import demo
+from bench_pipeline import git_commit, misspell, start_stub_thread
+from intent_cache import IntentCache
+
+# Phrasings the fast path answers on its own, and phrasings that need the LLM
+FAST_PATH_TEMPLATES = [
+    "What is the cheapest way from {origin} to {destination}?",
+    "fastest route from {origin} to {destination}",
+    "greenest way to get to {destination} from {origin}",
+    "I have luggage, how do I go between {origin} and {destination}?",
+]
+LLM_TEMPLATES = [
+    "How do I get from {origin} to {destination}?",
+    "Can you route me from {origin} to {destination}?",
+    "Take me to {destination} from {origin} please",
+]
+
+
+def synthesize_queries(locations, count, llm_share, rng):
+    """
+    Returns `count` queries between random locations, a share `llm_share` of them phrased so that they need the LLM.
+    Locations are misspelled half of the time.
+    """
+    queries = []
+    for _ in range(count):
+        origin, destination = rng.sample(locations, 2)
+        if rng.random() < 0.5:
+            origin, destination = misspell(origin, rng), misspell(destination, rng)
+        templates = LLM_TEMPLATES if rng.random() < llm_share else FAST_PATH_TEMPLATES
+        queries.append(rng.choice(templates).format(origin=origin, destination=destination))
+    return queries
+
+
+def read_query_log(file_path):
+    """
+    Reads one query per line; JSON lines with a "query" field are accepted too.
+    """
+    queries = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("{"):
+                line = json.loads(line).get("query", "")
+            if line:
+                queries.append(line)
+    return queries
+
+
+def run_query(user_input, scheduled):
+    """
+    Answers one query like a chat turn. Returns (latency since the scheduled start, error message or None, end time).
+    """
+    try:
+        parsed_input, result = demo.answer_query(user_input)
+        demo.format_answer(parsed_input, result)
+        error = None if result["status"] == "success" else result["message"]
+    except Exception as e:
+        error = f"exception: {e}"
+    end = time.perf_counter()
+    return end - scheduled, error, end
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_rate(rate, queries, args, rng):
+    """
+    Sends queries at `rate` per second for `args.duration` seconds and returns the report for that rate.
+    """
+    count = max(1, int(rate * args.duration))
+    if args.poisson:
+        offsets = list(itertools.accumulate(rng.expovariate(rate) for _ in range(count)))
+    else:
+        offsets = [i / rate for i in range(count)]
+
+    demo.intent_cache = IntentCache()
+    demo.model_router = None
+    demo.metrics.reset()
+    futures = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.max_workers) as pool:
+        start = time.perf_counter()
+        for offset, user_input in zip(offsets, itertools.cycle(queries)):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(run_query, user_input, start + offset))
+        outcomes = [future.result() for future in futures]
+
+    latencies = sorted(latency for latency, _, _ in outcomes)
+    errors = {}
+    for _, error, _ in outcomes:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    elapsed = max(end for _, _, end in outcomes) - start
+    counters = dict(demo.metrics.counters)
+    return {
+        "offered_rate": rate,
+        "queries": count,
+        "duration_s": round(elapsed, 3),
+        "throughput_per_s": round(count / elapsed, 2),
+        "error_rate": round(sum(errors.values()) / count, 4),
+        "parse_failures": counters.get("parse_failures", 0),
+        "llm_calls": counters.get("llm_calls", 0),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "stages": demo.metrics.summary(),
+        "routing": demo.get_router().stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test of the recommender (LLM + data path).")
+    parser.add_argument("--rates", default="5,10,20", help="Comma-separated arrival rates, in queries per second.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per rate.")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times instead of a fixed interval.")
+    parser.add_argument("--log", help="Replay the queries of this file (one per line) instead of synthesizing them.")
+    parser.add_argument("--data-dir", default=REPO_ROOT, help="Directory of travel_data.csv (or travel_data.store).")
+    parser.add_argument("--llm-share", type=float, default=0.5, help="Share of synthesized queries that need the LLM.")
+    parser.add_argument("--llm-url", help="OpenAI-compatible endpoint; a local stub is started when omitted.")
+    parser.add_argument("--model", default=demo.MODEL)
+    parser.add_argument("--small-model", default=demo.SMALL_MODEL, help="Model asked first when routing.")
+    parser.add_argument("--no-routing", action="store_true", help="Ask --model only (ROUTE_MODELS = False).")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub latency before the first token, in seconds.")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Stub delay between streamed chunks, in seconds.")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of stub answers that are not valid JSON.")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for the whole LLM answer (STREAM_INTENT = False).")
+    parser.add_argument("--intent-mode", choices=["json", "tool"], default=demo.INTENT_MODE, help="Free-text JSON or TRAVEL_TOOL calls.")
+    parser.add_argument("--max-workers", type=int, default=256, help="Queries in flight at most.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    demo.LIVE_UPDATES = False
+    demo.STREAM_INTENT = not args.no_stream
+    demo.INTENT_MODE = args.intent_mode
+    demo.MODEL = args.model
+    demo.SMALL_MODEL = args.small_model
+    demo.ROUTE_MODELS = not args.no_routing
+    demo.LM_STUDIO_URL = args.llm_url or start_stub_thread(
+        latency=args.latency, token_delay=args.token_delay, malformed_rate=args.malformed_rate, seed=args.seed,
+    )
+    demo.client = None
+    demo.path = args.data_dir + os.sep
+    demo.load_data()
+    # Warm up the client (imports, connection) so the first query is not an outlier
+    demo.get_client().models.list()
+    demo.metrics.enabled = True
+
+    rates = [float(rate) for rate in args.rates.split(",")]
+    if args.log:
+        queries = read_query_log(args.log)
+    else:
+        queries = synthesize_queries(demo.od_index.origins, int(max(rates) * args.duration), args.llm_share, rng)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "llm_url": demo.LM_STUDIO_URL,
+        "stream": demo.STREAM_INTENT,
+        "intent_mode": demo.INTENT_MODE,
+        "models": demo.intent_models(),
+        "runs": [],
+    }
+    for rate in rates:
+        run = run_rate(rate, queries, args, rng)
+        report["runs"].append(run)
+        print(
+            f"{rate:g} q/s offered: {run['throughput_per_s']} q/s done, {run['error_rate']:.1%} errors "
+            f"({run['parse_failures']} parse failures), p50 {run['p50_ms']} ms, p99 {run['p99_ms']} ms, max {run['max_ms']} ms"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
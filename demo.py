@@ -7,103 +7,230 @@
 
 
 # Standard library imports
-import pandas as pd
 import itertools
-from fuzzywuzzy import process
 import json
-import shutil
+import os
 import sys
 import threading
 import time
-import urllib.parse
-import urllib.request
 
-# Third-party imports
-from openai import OpenAI
-
-# Initialize LM Studio client
-client = OpenAI(base_url="http://127.0.0.1:1234/v1", api_key="lm-studio")
-# MODEL = "llama-3.2-3b-qnn"
+# Third-party libraries (pandas, fuzzywuzzy, openai) are imported on first use,
+# so that importing this module stays cheap for CLI one-shots and tests.
+
+# Local imports (standard library only)
+from intent_cache import IntentCache
+from intent_parser import FAST_PATH_CONFIDENCE, FastPathParser
+from metrics import Metrics
+from model_router import UNPARSABLE, ModelRouter, field_failure, validate_intent
+from streaming_json import OBJECT_END, StreamingJSONParser
+
+# LM Studio client, created by `get_client`
+LM_STUDIO_URL = "http://127.0.0.1:1234/v1"
+client = None
+# Intents are asked to SMALL_MODEL first, and to MODEL only when its answer fails
+# validation (see model_router.py); with ROUTE_MODELS = False only MODEL is used
+SMALL_MODEL = "llama-3.2-3b-qnn"
 MODEL = "qwen2.5-coder-32b-instruct"
+ROUTE_MODELS = True
+model_router = None
+# Stream the intent JSON and answer as soon as the needed fields are complete
+STREAM_INTENT = True
+# How the LLM returns the intent: "json" (free text following SYSTEM_MESSAGE)
+# or "tool" (a call of TRAVEL_TOOL, with the short TOOL_SYSTEM_MESSAGE)
+INTENT_MODE = "json"
+# Apply live cost updates appended to `travel_updates.jsonl` (see live_updates.py)
+LIVE_UPDATES = True
+# Time every stage of a query (see metrics.py); written to METRICS_FILE when the chat ends
+METRICS = False
 
 # read local document
 # refer to local_doc.py to know more about the local document.
 path = "C:\\Users\\qc_wo\\Desktop\\"
-df = pd.read_csv(f"{path}travel_data.csv")
-print("document opened. ")
 
+# Dataset and lookup structures, built by `load_data`
+df = None
+od_index = None
+origin_resolver = None
+destination_resolver = None
+scorer = None
+route_planner = None
+fast_parser = None
+update_feed = None
 
-# function design
+# Parsed intents of previous queries, kept across sessions
+intent_cache = IntentCache(path=f"{path}intent_cache.json")
+
+# Per-stage latency histograms and counters (`.jsonl` for JSON lines, Prometheus text otherwise)
+metrics = Metrics(enabled=METRICS)
+METRICS_FILE = f"{path}metrics.prom"
 
-def fuzzy_match(input_location, available_locations):
+
+def get_client():
     """
-    Matches a user-input location to the closest option in the dataset using fuzzy matching.
+    Returns the LM Studio client, creating it on first use.
     """
-    match, score = process.extractOne(input_location, available_locations)
-    if score > 70:  # Accept matches with a confidence score above the threshold
-        return match
-    else:
-        return None
+    global client
+    if client is None:
+        from openai import OpenAI
+
+        client = OpenAI(base_url=LM_STUDIO_URL, api_key="lm-studio")
+    return client
+
+
+def intent_models():
+    """
+    Returns the models asked for the intent of a query, in order.
+    """
+    return [SMALL_MODEL, MODEL] if ROUTE_MODELS and SMALL_MODEL != MODEL else [MODEL]
+
+
+def get_router():
+    """
+    Returns the model router, creating it on first use.
+    """
+    global model_router
+    if model_router is None:
+        model_router = ModelRouter(intent_models(), metrics)
+    return model_router
+
+
+def load_data():
+    """
+    Reads the local document and builds the lookup structures, once, on first use.
+    """
+    global df, od_index, origin_resolver, destination_resolver, scorer, route_planner, fast_parser, update_feed
+    if od_index is not None:
+        return
+
+    from location_resolver import LocationResolver
+    from route_planner import RoutePlanner
+    from scoring import MultiCriteriaScorer
+    from travel_store import load_od_index, load_travel_data
+
+    df = load_travel_data(f"{path}travel_data.csv")
+    od_index = load_od_index(f"{path}travel_data.csv", df)
+
+    # Places outside the dataset are snapped to the nearest location, given a gazetteer of coordinates
+    origin_snapper = destination_snapper = None
+    if os.path.exists(f"{path}gazetteer.csv"):
+        from geo_index import PlaceSnapper, load_gazetteer
+
+        gazetteer = load_gazetteer(f"{path}gazetteer.csv")
+        origin_snapper = PlaceSnapper(gazetteer, od_index.origins)
+        destination_snapper = PlaceSnapper(gazetteer, od_index.destinations)
+    origin_resolver = LocationResolver(od_index.origins, snapper=origin_snapper)
+    destination_resolver = LocationResolver(od_index.destinations, snapper=destination_snapper)
+    scorer = MultiCriteriaScorer(od_index)
+    route_planner = RoutePlanner(od_index)
+    print("document opened. ")
+
+    # Rule-based parser answering common phrasings without the LLM
+    fast_parser = FastPathParser(origin_resolver, destination_resolver)
+
+    if LIVE_UPDATES:
+        from live_updates import FileFeed
+
+        update_feed = FileFeed(od_index, f"{path}travel_updates.jsonl").start()
+
+
+# function design
 
 def fetch_recommended_mode(origin, destination, preferences):
     """
     Recommends the best travel mode based on user preferences.
     """
+    load_data()
+
     try:
-        # Fuzzy match origin and destination
-        matched_origin = fuzzy_match(origin, list(df.origin.unique()))
-        matched_destination = fuzzy_match(destination, list(df.destination.unique()))
-        # print(matched_origin, matched_destination)
+        # Fuzzy match origin and destination, or snap them to the nearest location
+        with metrics.span("resolve"):
+            origin_match = origin_resolver.match(origin)
+            destination_match = destination_resolver.match(destination)
+        # print(origin_match, destination_match)
 
-        if not matched_origin or not matched_destination:
+        if not origin_match or not destination_match:
             return {"status": "error", "message": "Origin or destination could not be matched."}
 
-        # Filter dataset for the given OD pair
-        filtered_data = df[(df["origin"] == matched_origin) & (df["destination"] == matched_destination)]
-        # print(filtered_data)
-
-        if filtered_data.empty:
-            return {"status": "error", "message": "No data available for the selected OD pair."}
-
-        # Sort data based on preferences
-        if preferences.get("priority") == "lowest_cost":
-            recommendation = filtered_data.nsmallest(1, "fare_cost")
-        elif preferences.get("priority") == "minimal_walking":
-            recommendation = filtered_data.nsmallest(1, "energy_cost")
-        elif preferences.get("priority") == "least_environmental_cost":
-            recommendation = filtered_data.nsmallest(1, "co2_cost")
-        elif preferences.get("priority") == "shortest_time":
-            recommendation = filtered_data.nsmallest(1, "time_cost")
-        else:
-            return {"status": "error", "message": "Unknown preference priority."}
+        snapped = []
+        for place, (location, distance_km), resolver in [(origin, origin_match, origin_resolver), (destination, destination_match, destination_resolver)]:
+            if distance_km > resolver.max_snap_km:
+                return {"status": "error", "message": f"{place} is {distance_km:,.1f} km from the nearest location with travel data ({location})."}
+            if distance_km > 0:
+                snapped.append({"place": place, "location": location, "distance_km": round(distance_km, 2)})
 
-        # Return the recommended mode
-        mode = recommendation.iloc[0].to_dict()
-        return {"status": "success", "mode": mode}
+        with metrics.span("lookup"):
+            result = _lookup(origin_match[0], destination_match[0], preferences)
+        if snapped and result["status"] == "success":
+            result["snapped"] = snapped
+        return result
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+def _lookup(matched_origin, matched_destination, preferences):
+    """
+    Recommendation for an OD pair whose locations are already matched to the dataset.
+    """
+    from od_index import PRIORITY_COLUMNS
+
+    # Look up the precomputed winners for the given OD pair
+    if (matched_origin, matched_destination) not in od_index:
+        # No direct row: chain several legs through other locations instead
+        if preferences.get("priority") in PRIORITY_COLUMNS:
+            route = route_planner.plan(matched_origin, matched_destination, preferences["priority"])
+            if route is not None:
+                return {"status": "success", "mode": route, "legs": route["legs"]}
+        return {"status": "error", "message": "No data available for the selected OD pair."}
+
+    # Trade off several costs at once when the user gave weights
+    if preferences.get("weights"):
+        top_k = preferences.get("top_k")
+        if top_k is None:
+            top_k = 3
+        elif isinstance(top_k, bool) or not isinstance(top_k, (int, float)) or not float(top_k).is_integer() or top_k < 1:
+            return {"status": "error", "message": "top_k must be a whole number of at least 1."}
+        # One snapshot of the index for both: a live update must not land between them
+        with od_index.lock:
+            ranked = scorer.rank(matched_origin, matched_destination, preferences["weights"], int(top_k))
+            pareto = scorer.pareto_front(matched_origin, matched_destination)
+        return {"status": "success", "mode": ranked[0], "ranked": ranked, "pareto": pareto}
+
+    if preferences.get("priority") not in PRIORITY_COLUMNS:
+        return {"status": "error", "message": "Unknown preference priority."}
+
+    mode = od_index.best_mode(matched_origin, matched_destination, preferences["priority"])
+    if mode is None:
+        return {"status": "error", "message": "No data available for the selected OD pair."}
+
+    # Return the recommended mode
+    return {"status": "success", "mode": mode}
+
+def fetch_recommended_modes(queries):
+    """
+    Batch version of `fetch_recommended_mode` for a DataFrame of (origin, destination, priority) queries.
+    Returns one row per query with `status` and `message` columns instead of error dicts.
+    """
+    load_data()
+    return od_index.recommend_batch(queries, origin_resolver.resolve, destination_resolver.resolve)
+
 # Define the tool for LM Studio to understand the travel mode priority 
+# Kept lean: the schema is sent with every request, so each description costs prompt tokens
 TRAVEL_TOOL = {
     "type": "function",
     "function": {
         "name": "fetch_recommended_mode",
-        "description": "Recommend the best travel mode for a given origin-destination pair based on user preferences.",
         "parameters": {
             "type": "object",
             "properties": {
-                "origin": {"type": "string", "description": "Starting location."},
-                "destination": {"type": "string", "description": "Destination location."},
+                "origin": {"type": "string"},
+                "destination": {"type": "string"},
                 "preferences": {
                     "type": "object",
                     "properties": {
-                        "priority": {
-                            "type": "string",
-                            "description": "User's primary preference (e.g., 'lowest_cost', 'minimal_walking', 'shortest_time','least_environmental_cost')."
-                        }
+                        "priority": {"enum": ["lowest_cost", "minimal_walking", "shortest_time", "least_environmental_cost"]},
+                        "weights": {"type": "object", "description": "Optional weights of time_cost, fare_cost, co2_cost, energy_cost (walking); replace priority."},
+                        "top_k": {"type": "integer", "minimum": 1},
                     },
-                    "required": ["priority"]
                 },
             },
             "required": ["origin", "destination", "preferences"],
@@ -145,26 +272,306 @@ class Spinner:
         self.write("\r")  # Move cursor to beginning of line
 
 
-def chat_with_llm():
-    # System message with instructions
-    system_message = {
-        "role": "system",
-        "content": (
-            "You are a travel assistant that helps users plan their travel routes. "
-            "Your role is to understand the user's query and return a structured JSON response with the following fields:"
-            "- `origin` (string): The starting location specified by the user."
-            "- `destination` (string): The target location specified by the user."
-            "- `preferences` (object): An object with a single key, `priority`, which must have one of the following values:"
-            "    - `lowest_cost`"
-            "    - `minimal_walking`"
-            "    - `shortest_time`"
-            "    - `least_environmental_cost`"
-            "### Requirements:"
-            "1. Always respond in a SINGLE JSON format. Do not include explanations or narratives."
-            "2. If unable to determine fields, set their values to `null`."
-        ),
-    }
+# System message with instructions
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": (
+        "You are a travel assistant that helps users plan their travel routes. "
+        "Your role is to understand the user's query and return a structured JSON response with the following fields:"
+        "- `origin` (string): The starting location specified by the user."
+        "- `destination` (string): The target location specified by the user."
+        "- `preferences` (object): An object with a single key, `priority`, which must have one of the following values:"
+        "    - `lowest_cost`"
+        "    - `minimal_walking`"
+        "    - `shortest_time`"
+        "    - `least_environmental_cost`"
+        "### Requirements:"
+        "1. Always respond in a SINGLE JSON format. Do not include explanations or narratives."
+        "2. If unable to determine fields, set their values to `null`."
+    ),
+}
+
+# System message of the tool-calling mode: the schema of TRAVEL_TOOL already describes the fields.
+# It never changes, so with the tool schema it forms a prompt prefix the server can keep cached.
+TOOL_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "Call fetch_recommended_mode for the user's trip; use null for anything not given.",
+}
+
+
+def intent_request(user_input, model=None):
+    """
+    Returns the chat completion arguments asking `model` (MODEL by default) for the intent of the query, in INTENT_MODE.
+    """
+    model = model or MODEL
+    if INTENT_MODE == "tool":
+        return {
+            "model": model,
+            "messages": [TOOL_SYSTEM_MESSAGE, {"role": "user", "content": user_input}],
+            "tools": [TRAVEL_TOOL],
+            "tool_choice": "required",
+        }
+    return {"model": model, "messages": [SYSTEM_MESSAGE, {"role": "user", "content": user_input}]}
+
+
+def intent_text(message):
+    """
+    Returns the intent JSON text of an LLM message (or stream delta): the tool call arguments, or else the content.
+    """
+    if getattr(message, "tool_calls", None):
+        return message.tool_calls[0].function.arguments or ""
+    return message.content or ""
+
+
+def record_usage(usage):
+    """
+    Counts the prompt and completion tokens reported by the server.
+    """
+    if usage is not None:
+        metrics.inc("prompt_tokens", usage.prompt_tokens)
+        metrics.inc("completion_tokens", usage.completion_tokens)
+
+
+def local_intent(user_input):
+    """
+    Answers the query without the LLM, from the fast-path parser or the intent cache.
+    Returns the intent, or None if the LLM is needed.
+    """
+    load_data()
+    # The rule-based parser also resolves the locations it finds, which the later stages reuse
+    with metrics.span("fast_path"):
+        parsed_input, confidence = fast_parser.parse(user_input)
+    if confidence >= FAST_PATH_CONFIDENCE:
+        metrics.inc("fast_path_hits")
+        return parsed_input
+
+    cached_intent = intent_cache.get(user_input)
+    if cached_intent is not None:
+        metrics.inc("intent_cache_hits")
+    return cached_intent
+
+
+def parse_intent(llm_content):
+    """
+    Parses and validates the JSON answer of the LLM.
+    Returns (intent, None) on success, or (None, message for the user) on failure.
+    """
+    # Parse the response
+    try:
+        with metrics.span("json_parse"):
+            parsed_input = json.loads(llm_content)
+    except (json.JSONDecodeError, TypeError):
+        metrics.inc("parse_failures")
+        return None, "I couldn't parse the response. Could you rephrase your query?"
+
+    # Validate the response structure
+    if (
+        not isinstance(parsed_input, dict)
+        or not parsed_input.get("origin")
+        or not parsed_input.get("destination")
+        or not parsed_input.get("preferences")
+    ):
+        metrics.inc("parse_failures")
+        return None, "I couldn't understand your request. Could you clarify?"
+
+    return parsed_input, None
+
+
+def ask_intent(user_input, model):
+    """
+    Asks `model` for the intent of the query in a single response.
+    Returns (intent JSON text, failure reason or None).
+    """
+    # Call the LLM for a response (the whole answer arrives at once, so first token = total)
+    metrics.inc("llm_calls")
+    start = time.perf_counter()
+    response = get_client().chat.completions.create(**intent_request(user_input, model))
+    metrics.observe("llm_first_token", time.perf_counter() - start)
+    metrics.observe("llm_total", time.perf_counter() - start)
+    record_usage(response.usage)
+    # print(f"response is :{response.choices[0].message}")
+    llm_content = intent_text(response.choices[0].message)
+    return llm_content, validate_intent(llm_content, origin_resolver.match, destination_resolver.match)
+
+
+def extract_intent(user_input):
+    """
+    Turns the user's query into {origin, destination, preferences}, from the fast-path parser,
+    the intent cache or the LLM (in that order).
+    Returns (intent, None, cacheable) on success, or (None, message for the user, False) on failure;
+    `cacheable` is True only for an LLM intent that passed validation, which is worth caching once its
+    recommendation succeeds.
+    """
+    cached_intent = local_intent(user_input)
+    if cached_intent is not None:
+        return cached_intent, None, False
+
+    llm_content, failure = get_router().route_sync(lambda model, escalate: ask_intent(user_input, model))
+
+    parsed_input, error_message = parse_intent(llm_content)
+    return parsed_input, error_message, parsed_input is not None and failure is None
 
+
+def stream_intent(user_input, model, escalate=False):
+    """
+    Streams the intent from `model` and parses it while it is generated: origin and destination are resolved
+    as soon as each field is complete, and the stream stops as soon as the `preferences` object closes.
+    With `escalate`, it also stops at the first field that fails validation, as the next model will be asked.
+    Returns ((intent or None if incomplete, text received), failure reason or None).
+    """
+    metrics.inc("llm_calls")
+    start = time.perf_counter()
+    response_stream = get_client().chat.completions.create(**intent_request(user_input, model), stream=True)
+
+    parser = StreamingJSONParser(report_object_ends=True, report_containers=True)
+    llm_content = ""
+    intent = {}
+    preferences = {}
+    preferences_closed = False
+    failure = None
+    parse_time = 0.0
+    try:
+        for chunk in response_stream:
+            record_usage(getattr(chunk, "usage", None))
+            # Tool call arguments are streamed as JSON text too
+            text = intent_text(chunk.choices[0].delta) if chunk.choices else ""
+            if not text:
+                continue
+            if not llm_content:
+                metrics.observe("llm_first_token", time.perf_counter() - start)
+            llm_content += text
+            parse_start = time.perf_counter()
+            try:
+                events = parser.feed(text)
+            except ValueError:
+                failure = failure or UNPARSABLE
+                break
+            finally:
+                parse_time += time.perf_counter() - parse_start
+
+            for field, value in events:
+                if field in (("origin",), ("destination",)) and not isinstance(value, (dict, list)):
+                    # resolved (and cached) while the model keeps generating
+                    with metrics.span("resolve"):
+                        failure = failure or field_failure(field[0], value, origin_resolver.match, destination_resolver.match)
+                    if value:
+                        intent[field[0]] = value
+                elif field == ("preferences",) and value is OBJECT_END:
+                    # Every preference is known: priority, and weights and top_k if any
+                    preferences_closed = True
+                    if not preferences.get("weights"):
+                        failure = failure or field_failure("priority", preferences.get("priority"), origin_resolver.match, destination_resolver.match)
+                elif field[0] == "preferences" and len(field) > 1 and value is not OBJECT_END:
+                    _set_path(preferences, field[1:], value)
+            if preferences_closed and "origin" in intent and "destination" in intent:
+                intent["preferences"] = preferences
+                break
+            if escalate and failure is not None:
+                break
+    finally:
+        # Stop the generation if we have what we need
+        response_stream.close()
+        metrics.observe("llm_total", time.perf_counter() - start)
+        metrics.observe("json_parse", parse_time)
+
+    if "preferences" not in intent:
+        if failure is None:
+            # The preferences did not complete early: check the whole answer
+            failure = validate_intent(llm_content, origin_resolver.match, destination_resolver.match)
+        return (None, llm_content), failure
+    return (intent, llm_content), failure
+
+
+def _set_path(target, path, value):
+    """
+    Stores a streamed value at its path (keys and array indices below `preferences`). Nested objects and
+    arrays are reported empty when they open and filled in order, so the result equals `json.loads` of the text.
+    """
+    for key in path[:-1]:
+        target = target[key]
+    if isinstance(target, list):
+        target.append(value)
+    else:
+        target[path[-1]] = value
+
+
+def recommend_streaming(user_input):
+    """
+    Streams the LLM answer and parses it while it is generated (see `stream_intent`), so the
+    recommendation is returned as soon as the `preferences` object closes, without waiting for the end of the stream.
+    Returns (intent, result); intent is None when the query could not be understood.
+    """
+    cached_intent = local_intent(user_input)
+    if cached_intent is not None:
+        return cached_intent, fetch_recommended_mode(cached_intent["origin"], cached_intent["destination"], cached_intent["preferences"])
+
+    (intent, llm_content), failure = get_router().route_sync(lambda model, escalate: stream_intent(user_input, model, escalate))
+
+    if intent is None:
+        # The preferences did not complete early: validate the whole answer as usual
+        intent, error_message = parse_intent(llm_content)
+        if intent is None:
+            return None, {"status": "error", "message": error_message}
+    result = fetch_recommended_mode(intent["origin"], intent["destination"], intent["preferences"])
+    # Only a validated intent that led to a recommendation is cached: a rejected one is asked again next time
+    if failure is None and result["status"] == "success":
+        intent_cache.put(user_input, intent)
+    return intent, result
+
+
+def answer_query(user_input):
+    """
+    Runs the whole pipeline for one query: intent extraction, then recommendation.
+    Returns (intent, result); intent is None when the query could not be understood.
+    """
+    metrics.inc("queries")
+    with metrics.span("query"):
+        if STREAM_INTENT:
+            parsed_input, result = recommend_streaming(user_input)
+        else:
+            parsed_input, error_message, cacheable = extract_intent(user_input)
+            if parsed_input is None:
+                result = {"status": "error", "message": error_message}
+            else:
+                result = fetch_recommended_mode(parsed_input["origin"], parsed_input["destination"], parsed_input["preferences"])
+                if cacheable and result["status"] == "success":
+                    intent_cache.put(user_input, parsed_input)
+
+    if result["status"] != "success":
+        metrics.inc("errors")
+    return parsed_input, result
+
+
+def format_answer(parsed_input, result):
+    """
+    Returns the assistant's reply for the result of `answer_query`.
+    """
+    if result["status"] != "success":
+        return f"\nAssistant: {result['message']}"
+
+    origin = parsed_input["origin"]
+    destination = parsed_input["destination"]
+    mode = result["mode"]
+    lines = [
+        f"\nAssistant: The best travel mode from {origin} to {destination} is '{mode['mode']}'.\n"
+        f"Details:\n- Time: {mode['time_cost']} minutes\n"
+        f"- Cost: ${mode['fare_cost']}\n"
+        f"- Emissions: {mode['co2_cost']} kg CO2\n"
+        f"- Walking Distance: {mode['energy_cost']} meters"
+    ]
+    if result.get("legs"):
+        for leg in result["legs"]:
+            lines.append(f"- Leg: {leg['origin']} -> {leg['destination']} by {leg['mode']} ({leg['time_cost']} minutes)")
+    if result.get("ranked"):
+        if len(result["ranked"]) > 1:
+            lines.append("- Alternatives: " + ", ".join(f"{m['mode']} (score {m['score']})" for m in result["ranked"][1:]))
+        lines.append("- Best trade-offs: " + ", ".join(m["mode"] for m in result["pareto"]))
+    for snap in result.get("snapped", []):
+        lines.append(f"- Note: no travel data for {snap['place']}; using {snap['location']}, {snap['distance_km']} km away")
+    return "\n".join(lines)
+
+
+def chat_with_llm():
     print(
         "Assistant: Hi! I can help you plan your travel routes based on your preferences. "
         "Let me know where you want to go and what matters most to you (e.g., minimal walking, less cost)."
@@ -176,53 +583,38 @@ def chat_with_llm():
         if user_input.lower() == "quit":
             break
 
-        # Reset the messages list for each query
-        messages = [system_message, {"role": "user", "content": user_input}]
-
         try:
             with Spinner("Thinking..."):
-                # Call the LLM for a response
-                response = client.chat.completions.create(
-                    model=MODEL,
-                    messages=messages,
-                )
-                # print(f"response is :{response.choices[0].message}")
-                llm_content = response.choices[0].message.content
-
-                # Parse the response
-                try:
-                    parsed_input = json.loads(llm_content)  
-                except json.JSONDecodeError:
-                    print("\nAssistant: I couldn't parse the response. Could you rephrase your query?")
-                    continue
-
-                # Validate the response structure
-                origin = parsed_input.get("origin")
-                destination = parsed_input.get("destination")
-                preferences = parsed_input.get("preferences")
-
-                if not origin or not destination or not preferences:
-                    print("\nAssistant: I couldn't understand your request. Could you clarify?")
-                    continue
-
-                # Call the travel recommendation function
-                result = fetch_recommended_mode(origin, destination, preferences)
-
-                if result["status"] == "success":
-                    mode = result["mode"]
-                    print(
-                        f"\nAssistant: The best travel mode from {origin} to {destination} is '{mode['mode']}'.\n"
-                        f"Details:\n- Time: {mode['time_cost']} minutes\n"
-                        f"- Cost: ${mode['fare_cost']}\n"
-                        f"- Emissions: {mode['co2_cost']} kg CO2\n"
-                        f"- Walking Distance: {mode['energy_cost']} meters"
-                    )
-                else:
-                    print(f"\nAssistant: {result['message']}")
+                # Understand the query and call the travel recommendation function
+                parsed_input, result = answer_query(user_input)
+
+                with metrics.span("format"):
+                    answer = format_answer(parsed_input, result)
+                print(answer)
 
         except Exception as e:
             print(f"\nError: {str(e)}")
 
+    intent_cache.save()
+    stats = intent_cache.stats()
+    print(f"Intent cache: {stats['hits']} hits, {stats['misses']} misses.")
+    stats = fast_parser.stats() if fast_parser else {"hits": 0, "attempts": 0}
+    print(f"Fast path: {stats['hits']} of {stats['attempts']} queries answered without the LLM.")
+    stats = get_router().stats()
+    if len(stats["models"]) > 1:
+        print(f"Model routing: {stats['escalations']} of {stats['queries']} LLM queries escalated ({stats['escalation_rate']:.0%}).")
+        for model, model_stats in stats["models"].items():
+            print(f"- {model}: {model_stats['calls']} calls, mean {model_stats['mean_ms']} ms, rejected answers {model_stats['failures']}")
+    if update_feed is not None:
+        update_feed.stop()
+        stats = update_feed.stats()
+        print(f"Live updates: {stats['applied']} applied, {stats['rejected']} rejected.")
+    if metrics.enabled:
+        metrics.export(METRICS_FILE)
+        for stage, stage_stats in metrics.summary().items():
+            print(f"{stage}: {stage_stats['count']} calls, mean {stage_stats['mean_ms']} ms, p99 <= {stage_stats['p99_ms']} ms")
+        print(f"Metrics written to '{METRICS_FILE}'.")
+
 
 # implement the code
 if __name__ == "__main__":
@@ -6,77 +6,93 @@
 
 
 # Standard library imports
-import pandas as pd
 import itertools
-from fuzzywuzzy import process
 import json
-import shutil
+import queue
 import sys
 import threading
 import time
-import urllib.parse
-import urllib.request
 
-# Third-party imports
-from openai import OpenAI
+# Third-party libraries (pandas, fuzzywuzzy, openai) are imported on first use,
+# so that importing this module stays cheap.
 
-# Initialize LM Studio client
-client = OpenAI(base_url="http://127.0.0.1:1234/v1", api_key="lm-studio")
+# LM Studio client, created by `get_client`
+client = None
 MODEL = "llama-3.2-3b-qnn"
 # MODEL = "qwen2.5-coder-32b-instruct"
 
 
 # read local documents
 path = "C:\\Users\\qc_wo\\Desktop\\"
-df = pd.read_csv(f"{path}travel_data.csv")
-print("document opened. ")
 
+# Dataset and lookup structures, built by `load_data`
+df = None
+od_index = None
+origin_resolver = None
+destination_resolver = None
 
-def fuzzy_match(input_location, available_locations):
+# Time to first token and total time of each explanation, in seconds
+explanation_timings = []
+
+
+def get_client():
     """
-    Matches a user-input location to the closest option in the dataset using fuzzy matching.
+    Returns the LM Studio client, creating it on first use.
     """
-    match, score = process.extractOne(input_location, available_locations)
-    if score > 70:  # Accept matches with a confidence score above the threshold
-        return match
-    else:
-        return None
+    global client
+    if client is None:
+        from openai import OpenAI
+
+        client = OpenAI(base_url="http://127.0.0.1:1234/v1", api_key="lm-studio")
+    return client
+
+
+def load_data():
+    """
+    Reads the local document and builds the lookup structures, once, on first use.
+    """
+    global df, od_index, origin_resolver, destination_resolver
+    if od_index is not None:
+        return
+
+    from location_resolver import LocationResolver
+    from travel_store import load_od_index, load_travel_data
+
+    df = load_travel_data(f"{path}travel_data.csv")
+    od_index = load_od_index(f"{path}travel_data.csv", df)
+    origin_resolver = LocationResolver(od_index.origins)
+    destination_resolver = LocationResolver(od_index.destinations)
+    print("document opened. ")
 
 
 def fetch_recommended_mode(origin, destination, preferences):
     """
     Recommends the best travel mode based on user preferences.
     """
+    load_data()
+    from od_index import PRIORITY_COLUMNS
+
     try:
         # Fuzzy match origin and destination
-        matched_origin = fuzzy_match(origin, list(df.origin.unique()))
-        matched_destination = fuzzy_match(destination, list(df.destination.unique()))
+        matched_origin = origin_resolver.resolve(origin)
+        matched_destination = destination_resolver.resolve(destination)
         # print(matched_origin, matched_destination)
 
         if not matched_origin or not matched_destination:
             return {"status": "error", "message": "Origin or destination could not be matched."}
 
-        # Filter dataset for the given OD pair
-        filtered_data = df[(df["origin"] == matched_origin) & (df["destination"] == matched_destination)]
-        # print(filtered_data)
-
-        if filtered_data.empty:
+        # Look up the precomputed winners for the given OD pair
+        if (matched_origin, matched_destination) not in od_index:
             return {"status": "error", "message": "No data available for the selected OD pair."}
 
-        # Sort data based on preferences
-        if preferences.get("priority") == "lowest_cost":
-            recommendation = filtered_data.nsmallest(1, "fare_cost")
-        elif preferences.get("priority") == "minimal_walking":
-            recommendation = filtered_data.nsmallest(1, "energy_cost")
-        elif preferences.get("priority") == "least_environmental_cost":
-            recommendation = filtered_data.nsmallest(1, "co2_cost")
-        elif preferences.get("priority") == "shortest_time":
-            recommendation = filtered_data.nsmallest(1, "time_cost")
-        else:
+        if preferences.get("priority") not in PRIORITY_COLUMNS:
             return {"status": "error", "message": "Unknown preference priority."}
 
+        mode = od_index.best_mode(matched_origin, matched_destination, preferences["priority"])
+        if mode is None:
+            return {"status": "error", "message": "No data available for the selected OD pair."}
+
         # Return the recommended mode
-        mode = recommendation.iloc[0].to_dict()
         return {"status": "success", "mode": mode}
 
     except Exception as e:
@@ -143,6 +159,65 @@ class Spinner:
         self.write("\r")  # Move cursor to beginning of line
 
 
+def explanation_messages(origin, destination, preferences):
+    """
+    Builds the prompt asking the LLM to explain the recommendation for the structured input.
+    """
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a travel assistant. Based on the provided structured input, suggest improvements.\n"
+                f"Input JSON: {json.dumps({'origin': origin, 'destination': destination, 'preferences': preferences})}"
+            ),
+        }
+    ]
+
+
+class ExplanationStream:
+    """
+    Streams the LLM explanation in a background thread, so that it is generated while the local data is looked up.
+    Iterating yields the tokens as they arrive; `first_token` and `total` are the seconds since the request started.
+    """
+
+    def __init__(self, messages):
+        self.tokens = queue.Queue()
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.total = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, args=(messages,), daemon=True)
+        self.thread.start()
+
+    def _run(self, messages):
+        try:
+            response_stream = get_client().chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                stream=True,  # Enable streaming
+            )
+            for chunk in response_stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    if self.first_token is None:
+                        self.first_token = time.perf_counter() - self.start
+                    self.tokens.put(content)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.total = time.perf_counter() - self.start
+            self.tokens.put(None)
+
+    def __iter__(self):
+        while True:
+            token = self.tokens.get()
+            if token is None:
+                return
+            yield token
+
+
 def chat_with_llm():
     print("Assistant: Hi! I can help you plan your travel routes based on your preferences.")
     print("Let me collect a few details. (Type 'quit' at any time to exit.)")
@@ -169,59 +244,54 @@ def chat_with_llm():
             print("Invalid preference. Please choose a valid option.")
             continue
 
+        # send input to LLaMa for explaination first, so that it is generated while the local data is looked up
+        preferences = {"priority": preference}
+        explanation = ExplanationStream(explanation_messages(origin, destination, preferences))
+
         # Use local data to fetch a recommendation
         try:
-            with Spinner("Fetching travel recommendation..."):
-                preferences = {"priority": preference}
-                result = fetch_recommended_mode(origin, destination, preferences)
-
-                if result["status"] == "success":
-                    mode = result["mode"]
-                    print(
-                        f"\n"
-                        f"\nAssistant: The best travel mode from {origin} to {destination} is '{mode['mode']}'.\n"
-                        f"Details for your trip:\n- Time: {mode['time_cost']} minutes\n"
-                        f"- Cost: ${mode['fare_cost']}\n"
-                        f"- Emissions: {mode['co2_cost']} kg CO2\n"
-                        f"- Walking Distance: {mode['energy_cost']} meters"
-                        f"\n"
-                    )
-                else:
-                    print(f"\nAssistant: {result['message']}")
+            result = fetch_recommended_mode(origin, destination, preferences)
+
+            if result["status"] == "success":
+                mode = result["mode"]
+                print(
+                    f"\nAssistant: The best travel mode from {origin} to {destination} is '{mode['mode']}'.\n"
+                    f"Details for your trip:\n- Time: {mode['time_cost']} minutes\n"
+                    f"- Cost: ${mode['fare_cost']}\n"
+                    f"- Emissions: {mode['co2_cost']} kg CO2\n"
+                    f"- Walking Distance: {mode['energy_cost']} meters"
+                    f"\n"
+                )
+            else:
+                print(f"\nAssistant: {result['message']}")
 
         except Exception as e:
             print(f"\nError: {str(e)}")
 
-        # send input to LLaMa for explaination
-        try:
-            with Spinner("Fetching mode choice explaination..."):
-                messages = [
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a travel assistant. Based on the provided structured input, suggest improvements.\n"
-                            f"Input JSON: {json.dumps({'origin': origin, 'destination': destination, 'preferences': preferences})}"
-                        ),
-                    }
-                ]
-
-                # Stream LLaMA response
-                response_stream = client.chat.completions.create(
-                    model=MODEL,
-                    messages=messages,
-                    stream=True,  # Enable streaming
-                )
-
-                # print("More LLaMA response (if any)")
-                for chunk in response_stream:
-                    # Print each part of the streamed response
-                    if "choices" in chunk:
-                        print(chunk["choices"][0]["delta"]["content"], end="", flush=True)
-
-                print("\n") 
-
-        except Exception as e:
-            print(f"\nError with LLaMA response: {str(e)}")
+        # Print the explanation as it streams in, with a spinner until its first token
+        tokens = iter(explanation)
+        with Spinner("Fetching mode choice explaination..."):
+            first = next(tokens, "")
+        print(first, end="", flush=True)
+        for token in tokens:
+            print(token, end="", flush=True)
+        print("\n")
+
+        if explanation.error is not None:
+            print(f"Error with LLaMA response: {str(explanation.error)}")
+        else:
+            explanation_timings.append((explanation.first_token, explanation.total))
+            first_token = "no tokens" if explanation.first_token is None else f"first token after {explanation.first_token:.2f} s"
+            print(f"(Explanation: {first_token}, done after {explanation.total:.2f} s)")
+
+    if explanation_timings:
+        first_tokens = [first_token for first_token, _ in explanation_timings if first_token is not None]
+        totals = [total for _, total in explanation_timings]
+        mean_first_token = f"{sum(first_tokens) / len(first_tokens):.2f} s" if first_tokens else "-"
+        print(
+            f"Explanations: {len(explanation_timings)}, mean time to first token {mean_first_token}, "
+            f"mean total {sum(totals) / len(totals):.2f} s"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+# This file gives locations coordinates and finds the nearest dataset location to
+# any place. A local gazetteer (`gazetteer.csv`: name, latitude, longitude) names
+# places outside the travel data, like landmarks; a place the dataset does not know
+# is looked up there and snapped to the nearest dataset location.
+# Nearest neighbours come from a uniform grid built once: points are placed on the
+# Earth's surface in 3-D (so distances hold anywhere on the globe), bucketed into
+# cubic cells, and a lookup only scans the cells around the query (or, far from
+# every point, only the cells that can still hold the nearest one).
+
+
+import csv
+import math
+
+import numpy as np
+
+from location_resolver import LocationResolver
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Points per occupied cell the grid aims for when no cell size is given
+TARGET_CELL_POINTS = 8
+# Rings of cells scanned around the query before falling back to a scan of all cells
+MAX_RINGS = 2
+
+
+def _surface_points(latitudes, longitudes):
+    """
+    Returns the (n, 3) positions in km of points on a spherical Earth.
+    """
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_latitudes = np.cos(latitudes)
+    return EARTH_RADIUS_KM * np.column_stack((cos_latitudes * np.cos(longitudes), cos_latitudes * np.sin(longitudes), np.sin(latitudes)))
+
+
+def _chord_to_km(chord):
+    """
+    Converts a straight-line distance through the Earth into the great-circle distance.
+    """
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / (2 * EARTH_RADIUS_KM)))
+
+
+def _ring_offsets(ring):
+    """
+    Returns the cell offsets at Chebyshev distance exactly `ring` from a cell.
+    """
+    span = range(-ring, ring + 1)
+    return [(dx, dy, dz) for dx in span for dy in span for dz in span if max(abs(dx), abs(dy), abs(dz)) == ring]
+
+
+class GridIndex:
+    """
+    Nearest-neighbour index over named points given by latitude and longitude.
+    """
+
+    def __init__(self, names, latitudes, longitudes, cell_km=None):
+        self.names = list(names)
+        points = _surface_points(latitudes, longitudes).reshape(-1, 3)
+        if cell_km is None:
+            cell_km = self._cell_size(points)
+        self.cell_km = cell_km
+
+        # Points sorted by cell, so each occupied cell is one slice of `_points`
+        cells = np.floor(points / cell_km).astype(np.int64)
+        order = np.lexsort((cells[:, 2], cells[:, 1], cells[:, 0]))
+        self._points = points[order]
+        self._positions = order
+        cells = cells[order]
+        unique_cells, starts = np.unique(cells, axis=0, return_index=True)
+        ends = np.append(starts[1:], len(cells)) if len(cells) else starts
+        self._cells = {tuple(cell): (start, end) for cell, start, end in zip(unique_cells.tolist(), starts.tolist(), ends.tolist())}
+        self._cell_centers = (unique_cells + 0.5) * cell_km
+        self._cell_slices = np.column_stack((starts, ends))
+        # The first scan covers the query's cell and its neighbours, later ones one ring each
+        self._rings = [_ring_offsets(0) + _ring_offsets(1)] + [_ring_offsets(ring) for ring in range(2, MAX_RINGS + 1)]
+
+    @staticmethod
+    def _cell_size(points):
+        """
+        Picks a cell size giving about TARGET_CELL_POINTS points per cell, for points spread over a surface.
+        """
+        if len(points) < 2:
+            return 1.0
+        extents = np.sort(np.ptp(points, axis=0))
+        area = max(extents[1] * extents[2], 1e-6)
+        return max(math.sqrt(area * TARGET_CELL_POINTS / len(points)), 0.001)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _closest(self, slices, point):
+        """
+        Returns (position in `_points`, squared distance) of the point closest to `point` among the slices.
+        """
+        # Neighbouring cells along z are usually adjacent in `_points`: copy them as one block
+        merged = []
+        for start, end in slices:
+            if merged and merged[-1][1] == start:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        slices = merged
+        if len(slices) == 1:
+            candidates = self._points[slices[0][0]:slices[0][1]]
+        else:
+            candidates = np.concatenate([self._points[start:end] for start, end in slices])
+        offsets = candidates - point
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        position = int(np.argmin(distances))
+        distance = float(distances[position])
+        for start, end in slices:
+            if position < end - start:
+                return start + position, distance
+            position -= end - start
+
+    def nearest(self, latitude, longitude):
+        """
+        Returns (name, great-circle distance in km) of the point closest to the coordinates, or None if the index is empty.
+        """
+        if not self.names:
+            return None
+
+        latitude, longitude = math.radians(latitude), math.radians(longitude)
+        point = (
+            EARTH_RADIUS_KM * math.cos(latitude) * math.cos(longitude),
+            EARTH_RADIUS_KM * math.cos(latitude) * math.sin(longitude),
+            EARTH_RADIUS_KM * math.sin(latitude),
+        )
+        cx, cy, cz = (math.floor(coordinate / self.cell_km) for coordinate in point)
+
+        best_position, best_distance = None, math.inf
+        cells = self._cells
+        for ring, offsets in enumerate(self._rings, start=1):
+            slices = [cells[cell] for cell in ((cx + dx, cy + dy, cz + dz) for dx, dy, dz in offsets) if cell in cells]
+            if slices:
+                position, distance = self._closest(slices, point)
+                if distance < best_distance:
+                    best_position, best_distance = position, distance
+            # Points outside the scanned rings are at least `ring` cells away
+            if best_distance <= (ring * self.cell_km) ** 2:
+                break
+        else:
+            # Far from every point: a cell's points lie within half a diagonal of its center, so only
+            # cells whose center is within a diagonal of the closest center's can hold the nearest point
+            center_distances = np.sqrt(((self._cell_centers - point) ** 2).sum(axis=1))
+            diagonal = self.cell_km * math.sqrt(3)
+            bound = min(center_distances.min() + diagonal, math.sqrt(best_distance) + diagonal / 2)
+            slices = self._cell_slices[center_distances <= bound].tolist()
+            if slices:
+                position, distance = self._closest(slices, point)
+                if distance < best_distance:
+                    best_position, best_distance = position, distance
+
+        return self.names[self._positions[best_position]], _chord_to_km(math.sqrt(best_distance))
+
+
+class Gazetteer:
+    """
+    Named places with coordinates, matched to free text the same way as dataset locations.
+    """
+
+    def __init__(self, places):
+        self.places = dict(places)
+        self.resolver = LocationResolver(self.places)
+
+    def __len__(self):
+        return len(self.places)
+
+    def coordinates(self, name):
+        """
+        Returns the (latitude, longitude) of an exact place name, or None.
+        """
+        return self.places.get(name)
+
+    def locate(self, text):
+        """
+        Returns (place name, latitude, longitude) of the place the text names, or None.
+        """
+        name = self.resolver.resolve(text)
+        if name is None:
+            return None
+        return (name, *self.places[name])
+
+
+def load_gazetteer(file_path):
+    """
+    Reads a CSV of places with `name`, `latitude` and `longitude` columns.
+    """
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        return Gazetteer((row["name"], (float(row["latitude"]), float(row["longitude"]))) for row in csv.DictReader(f))
+
+
+class PlaceSnapper:
+    """
+    Snaps places named in free text to the nearest of a set of dataset locations with gazetteer coordinates.
+    """
+
+    def __init__(self, gazetteer, locations, cell_km=None):
+        self.gazetteer = gazetteer
+        located = [location for location in locations if gazetteer.coordinates(location) is not None]
+        coordinates = np.array([gazetteer.coordinates(location) for location in located], dtype=np.float64).reshape(-1, 2)
+        self.index = GridIndex(located, coordinates[:, 0], coordinates[:, 1], cell_km)
+
+    def snap(self, text):
+        """
+        Returns (nearest dataset location, distance in km) for the place the text names, or None if it is not in the gazetteer.
+        """
+        place = self.gazetteer.locate(text)
+        if place is None:
+            return None
+        return self.index.nearest(place[1], place[2])
@@ -0,0 +1,115 @@
+# This file contains a minimal asyncio HTTP/1.1 server used by the recommendation
+# service and by the local LM Studio stub. It only supports what those two need:
+# JSON requests and responses, keep-alive connections and chunked streaming.
+
+
+import asyncio
+import json
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+MAX_BODY_SIZE = 1 << 20
+
+
+class Request:
+    """
+    A parsed HTTP request.
+    """
+
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body or b"null")
+
+
+async def read_request(reader):
+    """
+    Reads one request from the connection, or returns None when the client closed it.
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY_SIZE:
+        raise ValueError("Request body too large.")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, target.split("?", 1)[0], headers, body)
+
+
+async def write_response(writer, status, payload, content_type="application/json"):
+    """
+    Writes a response. `payload` is JSON-encoded unless it is bytes/str; an async iterator of
+    strings is sent with chunked transfer encoding as each item becomes available.
+    """
+    head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}", f"Content-Type: {content_type}"]
+
+    if hasattr(payload, "__aiter__"):
+        head.append("Transfer-Encoding: chunked")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode())
+        async for piece in payload:
+            data = piece.encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return
+
+    if isinstance(payload, str):
+        body = payload.encode()
+    elif isinstance(payload, bytes):
+        body = payload
+    else:
+        body = json.dumps(payload, default=str).encode()
+    head.append(f"Content-Length: {len(body)}")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+
+
+def connection_handler(handle):
+    """
+    Wraps `handle(request)` -> (status, payload[, content_type]) into an `asyncio.start_server`
+    callback that serves every request of a keep-alive connection.
+    """
+    async def serve_connection(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError as e:
+                    await write_response(writer, 413 if "large" in str(e) else 400, {"status": "error", "message": str(e)})
+                    break
+                if request is None:
+                    break
+
+                status, payload, *content_type = await handle(request)
+                await write_response(writer, status, payload, *content_type)
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return serve_connection
@@ -0,0 +1,114 @@
+# This file implements a cache of parsed user intents.
+# Most queries are repeats ("cheapest way from Central park to NYU tandon"), so the
+# {origin, destination, preferences} JSON returned by the LLM is stored under the
+# normalized query text and reused, skipping the model round trip entirely.
+
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """
+    Normalizes a query so that trivially different phrasings share a cache entry.
+    """
+    query = re.sub(r"\s+", " ", query.lower()).strip()
+    return query.strip(" ?!.")
+
+
+class IntentCache:
+    """
+    LRU cache with a time-to-live, mapping normalized query text to the parsed intent.
+    """
+
+    def __init__(self, maxsize=1024, ttl=24 * 3600, path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # normalized query -> (expiry timestamp, intent)
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, query):
+        """
+        Returns the cached intent for the query, or None on a miss or an expired entry.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query, intent):
+        """
+        Stores the intent for the query, evicting the least recently used entries if full.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, intent)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def load(self):
+        """
+        Loads the non-expired entries saved by `save`; an unreadable or corrupt file leaves the cache empty.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            entries = [(key, float(expires_at), intent) for key, (expires_at, intent) in saved.items()]
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Losing the cached intents only costs LLM calls, unlike failing to start
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, expires_at, intent in entries:
+                if expires_at >= now:
+                    self._entries[key] = (expires_at, intent)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """
+        Writes the cache to `path` (atomically, through a temporary file).
+        """
+        if not self.path:
+            return
+
+        with self._lock:
+            saved = {key: list(entry) for key, entry in self._entries.items()}
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        os.replace(temporary_path, self.path)
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the current size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
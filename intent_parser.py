@@ -0,0 +1,107 @@
+# This file implements a rule-based parser for the most common query phrasings,
+# such as "what is the cheapest way from Central park to NYU tandon?".
+# It runs before the LLM: when it confidently finds the origin, the destination
+# and the priority, the query is answered in milliseconds without a model call.
+
+
+import re
+import threading
+
+# Phrases hinting at each priority, checked on the lowercase query outside the place names.
+# A bare "shortest" means time, but "shortest walk" means walking and "shortest distance" is left to the LLM.
+PRIORITY_PATTERNS = {
+    "lowest_cost": r"\b(cheapest|cheaper|cheap|lowest cost|low cost|least expensive|inexpensive|budget|save money)\b",
+    "shortest_time": r"\b(fastest|faster|quickest|quicker|quickly|quick|fast|shortest time|shortest(?!\s+(walk|distance))|in a hurry|asap)\b",
+    "least_environmental_cost": r"\b(greenest|greener|green|eco|eco-friendly|environment\w*|sustainable|emissions?|co2|carbon)\b",
+    "minimal_walking": r"\b((least|less|minimal|minimum|shortest) walk(ing)?|no walking|avoid walking|(don't|do not|dont) want to walk|luggage|wheelchair)\b",
+}
+
+# Ways of naming the two places, tried in order
+PLACE_PATTERNS = [
+    r"\bfrom\s+(?P<origin>.+?)\s+to\s+(?P<destination>.+?)\s*(?:[?.!,;]|$)",
+    r"\bto\s+(?P<destination>.+?)\s+from\s+(?P<origin>.+?)\s*(?:[?.!,;]|$)",
+    r"\bbetween\s+(?P<origin>.+?)\s+and\s+(?P<destination>.+?)\s*(?:[?.!,;]|$)",
+]
+
+# Confidence at or above which the parsed intent is used instead of calling the LLM
+FAST_PATH_CONFIDENCE = 1.0
+
+
+class FastPathParser:
+    """
+    Extracts {origin, destination, preferences} from common phrasings, with a confidence score.
+    """
+
+    def __init__(self, origin_resolver, destination_resolver):
+        self.origin_resolver = origin_resolver
+        self.destination_resolver = destination_resolver
+        self._priority_patterns = {priority: re.compile(pattern) for priority, pattern in PRIORITY_PATTERNS.items()}
+        self._place_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in PLACE_PATTERNS]
+        self.attempts = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def parse(self, query):
+        """
+        Returns (intent, confidence). The confidence is 1.0 when both places match the location
+        vocabulary and exactly one priority was recognized, 0.5 when only one of the two holds,
+        and 0.0 otherwise (the intent is then None).
+        """
+        places = self._find_places(query)
+        if places is None:
+            confidence, intent = 0.0, None
+        else:
+            origin, destination, spans = places
+            # Words of the place names ("Fast Lane Plaza") do not hint at a priority
+            text, end = [], 0
+            for start, stop in sorted(spans):
+                text.append(query[end:start])
+                end = stop
+            text.append(query[end:])
+            priorities = [priority for priority, pattern in self._priority_patterns.items() if pattern.search(" ".join(text).lower())]
+            priority = priorities[0] if len(priorities) == 1 else None
+            intent = {"origin": origin, "destination": destination, "preferences": {"priority": priority}}
+            confidence = 1.0 if priority else 0.5
+
+        with self._lock:
+            self.attempts += 1
+            if confidence >= FAST_PATH_CONFIDENCE:
+                self.hits += 1
+        return intent, confidence
+
+    def _find_places(self, query):
+        """
+        Returns the (origin, destination) dataset names named in the query (typed places for snapped ones)
+        and the spans of the two names in the query, or None.
+        """
+        for pattern in self._place_patterns:
+            found = pattern.search(query)
+            if not found:
+                continue
+
+            origin = self._place(self.origin_resolver, found.group("origin").strip())
+            destination = self._place(self.destination_resolver, found.group("destination").strip())
+            if origin and destination:
+                return origin, destination, [found.span("origin"), found.span("destination")]
+        return None
+
+    @staticmethod
+    def _place(resolver, text):
+        """
+        Returns the dataset name for the text, or the text itself when it names a place snapped to a nearby
+        location, so that the lookup can report the snap distance; None if it cannot be resolved.
+        """
+        location = resolver.resolve(text)
+        if location is None:
+            return None
+        return location if resolver.match(text)[1] == 0 else text
+
+    def stats(self):
+        """
+        Returns how many queries were parsed and how many were answered by the fast path.
+        """
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+        }
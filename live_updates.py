@@ -0,0 +1,166 @@
+# This file feeds live travel-cost changes (delays, surge pricing, closures) into
+# a running ODIndex without rebuilding it. Updates are JSON objects, one per line,
+# such as {"origin": "Central_Park", "destination": "NYU_Tandon", "mode": "Drive", "time_cost": 55},
+# read either from a file that other processes append to, or from a local TCP socket.
+#
+# Usage: python live_updates.py travel_updates.jsonl '{"origin": "...", "destination": "...", "mode": "...", "time_cost": 55}'
+
+
+import json
+import os
+import socketserver
+import sys
+import threading
+
+
+def parse_updates(lines):
+    """
+    Decodes JSON lines into update dicts. Returns (updates, number of malformed lines); blank lines are skipped.
+    """
+    updates = []
+    malformed = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            update = json.loads(line)
+        except ValueError:
+            malformed += 1
+            continue
+        if isinstance(update, dict):
+            updates.append(update)
+        else:
+            malformed += 1
+    return updates, malformed
+
+
+class UpdateFeed:
+    """
+    Counts what a feed applied to the index; every batch of lines is applied atomically.
+    """
+
+    def __init__(self, od_index):
+        self.od_index = od_index
+        self.applied = 0
+        self.rejected = 0
+        self._counts_lock = threading.Lock()
+
+    def apply_lines(self, lines):
+        """
+        Applies a batch of JSON lines and returns (applied, rejected) for that batch.
+        """
+        updates, malformed = parse_updates(lines)
+        applied, rejected = self.od_index.apply_updates(updates)
+        with self._counts_lock:
+            self.applied += applied
+            self.rejected += len(rejected) + malformed
+        return applied, len(rejected) + malformed
+
+    def stats(self):
+        return {"applied": self.applied, "rejected": self.rejected}
+
+
+class FileFeed(UpdateFeed):
+    """
+    Follows a JSON-lines file in a background thread (like `tail -f`), applying the lines appended to it.
+    Lines already in the file when the feed starts are skipped unless `from_start` is set.
+    """
+
+    def __init__(self, od_index, file_path, poll_interval=0.5, from_start=False):
+        super().__init__(od_index)
+        self.file_path = file_path
+        self.poll_interval = poll_interval
+        self._offset = 0 if from_start or not os.path.exists(file_path) else os.path.getsize(file_path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="file-update-feed", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def poll(self):
+        """
+        Applies the complete lines appended since the last poll. Returns (applied, rejected).
+        """
+        if not os.path.exists(self.file_path):
+            return 0, 0
+        if os.path.getsize(self.file_path) < self._offset:
+            # The file was truncated or replaced: start over from its beginning
+            self._offset = 0
+
+        with open(self.file_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A partly written last line is left for the next poll
+        complete = data[:data.rfind(b"\n") + 1]
+        if not complete:
+            return 0, 0
+        self._offset += len(complete)
+        return self.apply_lines(complete.decode("utf-8").splitlines())
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except OSError as e:
+                print(f"Live update feed error: {e}")
+            self._stop.wait(self.poll_interval)
+
+
+class _UpdateHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # Each line is applied on arrival and acknowledged with the counts for it
+        for line in self.rfile:
+            applied, rejected = self.server.feed.apply_lines([line.decode("utf-8", "replace")])
+            self.wfile.write(json.dumps({"applied": applied, "rejected": rejected}).encode() + b"\n")
+
+
+class _UpdateServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SocketFeed(UpdateFeed):
+    """
+    Accepts updates as JSON lines on a local TCP socket, one connection per publisher.
+    """
+
+    def __init__(self, od_index, host="127.0.0.1", port=8765):
+        super().__init__(od_index)
+        self.server = _UpdateServer((host, port), _UpdateHandler)
+        self.server.feed = self
+        self.address = self.server.server_address
+        self._thread = threading.Thread(target=self.server.serve_forever, name="socket-update-feed", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+
+def append_updates(file_path, updates):
+    """
+    Appends updates to a feed file, one JSON object per line, in a single write.
+    """
+    with open(file_path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(update) + "\n" for update in updates))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python live_updates.py travel_updates.jsonl '<update JSON>' ...")
+        sys.exit(1)
+
+    updates, malformed = parse_updates(sys.argv[2:])
+    if malformed:
+        print(f"Skipped {malformed} malformed update(s).")
+    append_updates(sys.argv[1], updates)
+    print(f"Appended {len(updates)} update(s) to '{sys.argv[1]}'.")
@@ -0,0 +1,243 @@
+# This file implements a local stand-in for the LM Studio server, for tests,
+# benchmarks and offline runs. It speaks the OpenAI-compatible chat completions
+# API (plain and streamed) and answers intent prompts with a JSON object built
+# from simple rules, after a configurable latency. When the request offers tools,
+# the intent comes back as a tool call; its arguments are valid JSON unless
+# `tool_malformed_rate` says otherwise (servers that constrain tool-call decoding
+# to the schema never break them, others can). Each model name can get its own
+# latency and error rates, to stand in for a small and a large model.
+#
+# Usage: python lmstudio_stub.py --port 1234 --latency 0.5 --token-delay 0.01
+#   --tool-malformed-rate 0.02 --profile llama-3.2-3b-qnn:latency=0.1,malformed_rate=0.1,null_rate=0.05 --profile qwen2.5-coder-32b-instruct:latency=0.8
+
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+from http_server import connection_handler
+from intent_parser import PLACE_PATTERNS, PRIORITY_PATTERNS
+
+EXPLANATION = "Based on your preferences, this mode balances travel time, cost and comfort for your trip."
+PROFILE_SETTINGS = ["latency", "token_delay", "malformed_rate", "null_rate", "tool_malformed_rate"]
+
+
+class StubModel:
+    """
+    Fake model answering chat completion requests.
+    `profiles` maps model names to their own values of PROFILE_SETTINGS; other names get the defaults.
+    `null_rate` is the share of intents in which one field is left null (free text and tool calls alike);
+    `malformed_rate` and `tool_malformed_rate` are the shares of free-text answers and of tool call arguments that are not valid JSON.
+    """
+
+    def __init__(self, model="stub-model", latency=0.0, token_delay=0.0, malformed_rate=0.0, null_rate=0.0, tool_malformed_rate=0.0,
+                 seed=0, profiles=None):
+        self.model = model
+        self.latency = latency
+        self.token_delay = token_delay
+        self.malformed_rate = malformed_rate
+        self.null_rate = null_rate
+        self.tool_malformed_rate = tool_malformed_rate
+        self.profiles = profiles or {}
+        self.requests = 0
+        self.model_requests = {}
+        self._random = random.Random(seed)
+
+    def settings(self, model):
+        """
+        Returns the latency and error rates used to answer a request for `model`.
+        """
+        return {**{name: getattr(self, name) for name in PROFILE_SETTINGS}, **self.profiles.get(model, {})}
+
+    def reply(self, messages, settings=None):
+        """
+        Returns the assistant's text for the conversation: the intent JSON for a user query,
+        or a short explanation when there is no user message (as in `demo_basic.py`).
+        """
+        settings = settings or self.settings(self.model)
+        queries = [message["content"] for message in messages if message.get("role") == "user"]
+        if not queries:
+            return EXPLANATION
+
+        content = json.dumps(self.intent(queries[-1], settings["null_rate"]))
+        if self._random.random() < settings["malformed_rate"]:
+            # Mimic a model wrapping its JSON in narrative text
+            content = f"Sure! Here is the JSON: {content[:-1]}"
+        return content
+
+    def intent(self, query, null_rate=0.0):
+        """
+        Returns the {origin, destination, preferences} dict a model would extract from the query.
+        """
+        intent = {"origin": None, "destination": None, "preferences": {"priority": None}}
+        for pattern in PLACE_PATTERNS:
+            found = re.search(pattern, query, re.IGNORECASE)
+            if found:
+                intent["origin"] = found.group("origin").strip()
+                intent["destination"] = found.group("destination").strip()
+                break
+        for priority, pattern in PRIORITY_PATTERNS.items():
+            if re.search(pattern, query.lower()):
+                intent["preferences"]["priority"] = priority
+                break
+        if intent["preferences"]["priority"] is None:
+            intent["preferences"]["priority"] = "shortest_time"
+
+        if self._random.random() < null_rate:
+            # Mimic a model missing one of the fields
+            field = self._random.choice(["origin", "destination", "priority"])
+            if field == "priority":
+                intent["preferences"]["priority"] = None
+            else:
+                intent[field] = None
+        return intent
+
+    def tool_call(self, messages, tools, settings=None):
+        """
+        Returns (tool name, arguments JSON) calling the first offered tool with the intent of the last user query.
+        """
+        settings = settings or self.settings(self.model)
+        queries = [message["content"] for message in messages if message.get("role") == "user"]
+        arguments = json.dumps(self.intent(queries[-1] if queries else "", settings["null_rate"]))
+        if self._random.random() < settings["tool_malformed_rate"]:
+            # Mimic an unconstrained server cutting the arguments short
+            arguments = arguments[:-1]
+        return tools[0]["function"]["name"], arguments
+
+    def completion(self, content, prompt_tokens, tool_call=None):
+        message = {"role": "assistant", "content": content}
+        if tool_call is not None:
+            name, content = tool_call
+            message = {"role": "assistant", "content": None, "tool_calls": [
+                {"id": f"call-stub-{self.requests}", "type": "function", "function": {"name": name, "arguments": content}},
+            ]}
+        return {
+            "id": f"chatcmpl-stub-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop" if tool_call is None else "tool_calls"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": count_tokens(content),
+                "total_tokens": prompt_tokens + count_tokens(content),
+            },
+        }
+
+    async def stream(self, content, tool_call=None, token_delay=0.0):
+        """
+        Yields the answer (or the tool call arguments) as server-sent events, a few characters at a time.
+        """
+        chunk = {"id": f"chatcmpl-stub-{self.requests}", "object": "chat.completion.chunk", "created": int(time.time()), "model": self.model}
+        for start in range(0, len(content), 4):
+            if tool_call is None:
+                delta = {"content": content[start:start + 4]}
+            else:
+                function = {"arguments": content[start:start + 4]}
+                if start == 0:
+                    function["name"] = tool_call[0]
+                delta = {"tool_calls": [{"index": 0, "id": f"call-stub-{self.requests}", "type": "function", "function": function}]}
+            if start == 0:
+                delta["role"] = "assistant"
+            yield "data: " + json.dumps({**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}) + "\n\n"
+            if token_delay:
+                await asyncio.sleep(token_delay)
+        finish_reason = "stop" if tool_call is None else "tool_calls"
+        yield "data: " + json.dumps({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}) + "\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def handle(self, request):
+        if request.method == "GET" and request.path == "/v1/models":
+            models = dict.fromkeys([self.model, *self.profiles])
+            return 200, {"object": "list", "data": [{"id": model, "object": "model"} for model in models]}
+        if request.path != "/v1/chat/completions":
+            return 404, {"error": {"message": f"Unknown endpoint {request.path}."}}
+        if request.method != "POST":
+            return 405, {"error": {"message": "Use POST."}}
+
+        body = request.json()
+        model = body.get("model", self.model)
+        settings = self.settings(model)
+        self.requests += 1
+        self.model_requests[model] = self.model_requests.get(model, 0) + 1
+        if settings["latency"]:
+            await asyncio.sleep(settings["latency"])
+
+        messages = body.get("messages", [])
+        tools = body.get("tools") or []
+        tool_call = None
+        if tools and body.get("tool_choice") != "none":
+            tool_call = self.tool_call(messages, tools, settings)
+            content = tool_call[1]
+        else:
+            content = self.reply(messages, settings)
+        if body.get("stream"):
+            return 200, self.stream(content, tool_call, settings["token_delay"]), "text/event-stream"
+        if settings["token_delay"]:
+            # Same generation time as the streamed answer, delivered at once
+            await asyncio.sleep(settings["token_delay"] * -(-len(content) // 4))
+        # Tool schemas are part of the prompt the model reads
+        prompt_tokens = sum(count_tokens(message.get("content") or "") for message in messages)
+        prompt_tokens += count_tokens(json.dumps(tools)) if tools else 0
+        return 200, self.completion(None if tool_call else content, prompt_tokens, tool_call)
+
+
+def parse_profile(text):
+    """
+    Parses a `--profile` value such as "llama-3.2-3b-qnn:latency=0.1,malformed_rate=0.2" into (model, settings).
+    """
+    model, _, options = text.partition(":")
+    settings = {}
+    for option in filter(None, options.split(",")):
+        name, _, value = option.partition("=")
+        if name.strip() not in PROFILE_SETTINGS:
+            raise argparse.ArgumentTypeError(f"Unknown profile setting {name!r}; use one of {', '.join(PROFILE_SETTINGS)}.")
+        settings[name.strip()] = float(value)
+    return model, settings
+
+
+def count_tokens(text):
+    """
+    Rough token count (about four characters per token).
+    """
+    return max(1, len(text) // 4)
+
+
+async def start_stub(host="127.0.0.1", port=1234, **options):
+    """
+    Starts the stub server and returns (server, model); port 0 picks a free port.
+    """
+    model = StubModel(**options)
+    server = await asyncio.start_server(connection_handler(model.handle), host, port)
+    return server, model
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub of the LM Studio server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--model", default="stub-model")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the first token.")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks.")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of answers that are not valid JSON.")
+    parser.add_argument("--null-rate", type=float, default=0.0, help="Share of answers with a null field.")
+    parser.add_argument("--tool-malformed-rate", type=float, default=0.0, help="Share of tool call arguments that are not valid JSON.")
+    parser.add_argument("--profile", type=parse_profile, action="append", default=[],
+                        help="Per-model settings, e.g. llama-3.2-3b-qnn:latency=0.1,malformed_rate=0.1 (repeatable).")
+    args = parser.parse_args()
+
+    server, _ = await start_stub(
+        args.host, args.port, model=args.model, latency=args.latency, token_delay=args.token_delay,
+        malformed_rate=args.malformed_rate, null_rate=args.null_rate, tool_malformed_rate=args.tool_malformed_rate,
+        profiles=dict(args.profile),
+    )
+    print(f"LM Studio stub listening on http://{args.host}:{args.port}/v1")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,11 +2,17 @@
 # for various origins, destinations, and modes of transport. 
 # The dataset is designed to serve as a `substitute for real-time API data`, 
 # supporting user-preference-based `travel mode recommendations`.
+#
+# The generator scales from the 4 demo locations to city-scale tables: costs are drawn
+# with NumPy in bulk and rows are written in chunks, so memory stays bounded.
+#
+# Usage: python local_doc.py [--locations 4] [--cities 1] [--seed 1024] [--output travel_data.csv]
     
 
+import argparse
+
+import numpy as np
 import pandas as pd
-import random
-random.seed(1024)
 path = "C:\\Users\\qc_wo\\Desktop\\" 
 
 # Generate a list of locations
@@ -15,38 +21,106 @@ locations = [ "Central_Park", "Times_Square", "NYU_Tandon","Brooklyn_Bridge"]
 # Travel modes
 modes = ["Drive", "Ride-hailing", "Citi_bike", "Public_transit"]
 
-# Generate random OD pairs and travel details for each mode
-data = []
-for origin in locations:
-    for destination in locations:
-        if origin != destination:
-            for mode in modes:
-                if mode == "Drive":
-                    time_cost = random.randint(10, 40)
-                    fare_cost = round(random.uniform(5, 20), 2)
-                    co2_cost = round(random.uniform(10, 30), 2)
-                    energy_cost = random.randint(50, 200) # Walking distance in meters
-                elif mode == "Ride-hailing":
-                    time_cost = random.randint(15, 50)
-                    fare_cost = round(random.uniform(10, 40), 2)
-                    co2_cost = round(random.uniform(5, 15), 2)
-                    energy_cost = random.randint(20, 80) 
-                elif mode == "Citi_bike":
-                    time_cost = random.randint(20, 60)
-                    fare_cost = round(random.uniform(3.5, 5), 2)
-                    co2_cost = round(random.uniform(0.1, 1.0), 2)
-                    energy_cost = random.randint(200, 1000)  
-                elif mode == "Public_transit":
-                    time_cost = random.randint(25, 75)
-                    fare_cost = round(random.uniform(2.7, 5), 2)
-                    co2_cost = round(random.uniform(1, 5), 2)
-                    energy_cost = random.randint(300, 1500)  
-
-                data.append([origin, destination, mode, time_cost, fare_cost, co2_cost, energy_cost])
-
-# Create a DataFrame
-df = pd.DataFrame(data, columns=["origin", "destination", "mode", "time_cost", "fare_cost", "co2_cost", "energy_cost"])
-
-# Save the dataset to a CSV file
-df.to_csv(f"{path}travel_data.csv", index=False)
-print("Artificial dataset with travel modes generated and saved as 'travel_data.csv'.")
\ No newline at end of file
+# Cost ranges per mode: integer columns are drawn like `random.randint`, the others uniformly
+# and rounded to 2 decimals. energy_cost is the walking distance in meters.
+MODE_PROFILES = {
+    "Drive": {"time_cost": (10, 40), "fare_cost": (5, 20), "co2_cost": (10, 30), "energy_cost": (50, 200)},
+    "Ride-hailing": {"time_cost": (15, 50), "fare_cost": (10, 40), "co2_cost": (5, 15), "energy_cost": (20, 80)},
+    "Citi_bike": {"time_cost": (20, 60), "fare_cost": (3.5, 5), "co2_cost": (0.1, 1.0), "energy_cost": (200, 1000)},
+    "Public_transit": {"time_cost": (25, 75), "fare_cost": (2.7, 5), "co2_cost": (1, 5), "energy_cost": (300, 1500)},
+}
+INTEGER_COLUMNS = ["time_cost", "energy_cost"]
+FLOAT_COLUMNS = ["fare_cost", "co2_cost"]
+COLUMNS = ["origin", "destination", "mode", "time_cost", "fare_cost", "co2_cost", "energy_cost"]
+
+
+def make_locations(n_locations=len(locations), n_cities=1):
+    """
+    Returns one list of location names per city. With the default arguments this is the
+    4 demo locations; larger networks get generated names such as `City2_Location_00017`.
+    """
+    if n_cities == 1 and n_locations <= len(locations):
+        return [locations[:n_locations]]
+
+    cities = []
+    for city in range(n_cities):
+        # Spread the locations as evenly as possible across the cities
+        size = n_locations // n_cities + (city < n_locations % n_cities)
+        cities.append([f"City{city + 1}_Location_{i:05d}" for i in range(size)])
+    return cities
+
+
+def generate_travel_data(n_locations=len(locations), n_cities=1, seed=1024, chunk_size=1_000_000):
+    """
+    Yields the dataset as DataFrames of about `chunk_size` rows (with the columns of `travel_data.csv`).
+    Every ordered pair of distinct locations within a city gets one row per mode.
+    The output is deterministic for a given set of arguments.
+    """
+    rng = np.random.default_rng(seed)
+    n_modes = len(modes)
+    mode_names = pd.Categorical.from_codes(np.arange(n_modes), categories=modes)
+    bounds = {
+        column: (
+            np.array([MODE_PROFILES[mode][column][0] for mode in modes]),
+            np.array([MODE_PROFILES[mode][column][1] for mode in modes]),
+        )
+        for column in INTEGER_COLUMNS + FLOAT_COLUMNS
+    }
+
+    for city_locations in make_locations(n_locations, n_cities):
+        n = len(city_locations)
+        if n < 2:
+            continue
+        names = pd.Index(city_locations)
+        origins_per_chunk = max(1, chunk_size // ((n - 1) * n_modes))
+
+        for first in range(0, n, origins_per_chunk):
+            # All (origin, destination) pairs of this block of origins, in row order
+            origin_ids = np.repeat(np.arange(first, min(first + origins_per_chunk, n)), n)
+            destination_ids = np.tile(np.arange(n), len(origin_ids) // n)
+            keep = origin_ids != destination_ids
+            origin_ids = np.repeat(origin_ids[keep], n_modes)
+            destination_ids = np.repeat(destination_ids[keep], n_modes)
+            mode_ids = np.tile(np.arange(n_modes), len(origin_ids) // n_modes)
+
+            chunk = {
+                "origin": pd.Categorical.from_codes(origin_ids, categories=names),
+                "destination": pd.Categorical.from_codes(destination_ids, categories=names),
+                "mode": mode_names[mode_ids],
+            }
+            for column in INTEGER_COLUMNS:
+                low, high = bounds[column]
+                chunk[column] = rng.integers(low[mode_ids], high[mode_ids], endpoint=True)
+            for column in FLOAT_COLUMNS:
+                low, high = bounds[column]
+                chunk[column] = np.round(rng.uniform(low[mode_ids], high[mode_ids]), 2)
+
+            yield pd.DataFrame(chunk, columns=COLUMNS)
+
+
+def write_travel_data(file_path, **options):
+    """
+    Streams the generated dataset to a CSV file chunk by chunk and returns the number of rows written.
+    """
+    rows = 0
+    for chunk in generate_travel_data(**options):
+        chunk.to_csv(file_path, mode="a" if rows else "w", header=not rows, index=False)
+        rows += len(chunk)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the artificial travel dataset.")
+    parser.add_argument("--locations", type=int, default=len(locations), help="Number of locations.")
+    parser.add_argument("--cities", type=int, default=1, help="Number of cities the locations are spread across.")
+    parser.add_argument("--seed", type=int, default=1024)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Rows generated and written at a time.")
+    parser.add_argument("--output", default=f"{path}travel_data.csv")
+    args = parser.parse_args()
+
+    # Save the dataset to a CSV file
+    rows = write_travel_data(
+        args.output, n_locations=args.locations, n_cities=args.cities,
+        seed=args.seed, chunk_size=args.chunk_size,
+    )
+    print(f"Artificial dataset with travel modes generated and saved as '{args.output}' ({rows} rows).")
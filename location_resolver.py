@@ -0,0 +1,108 @@
+# This file implements a reusable resolver from free-text locations to the
+# canonical location names of the dataset.
+# The vocabulary is indexed once by character trigrams, so only the few most
+# similar names are scored with fuzzywuzzy, and resolved strings are cached.
+# Optionally, a place missing from the vocabulary is snapped to the nearest
+# location through a `geo_index.PlaceSnapper`.
+
+
+import functools
+
+import numpy as np
+from fuzzywuzzy import process
+from fuzzywuzzy import utils
+
+# Same acceptance rule as the demos' original `fuzzy_match`: a score strictly above the threshold
+MATCH_THRESHOLD = 70
+# Farthest a place may be from the dataset location it is snapped to
+MAX_SNAP_KM = 2.0
+
+
+def _trigrams(text):
+    """
+    Returns the set of character trigrams of a processed (lowercase, alphanumeric) string.
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocationResolver:
+    """
+    Resolves user-typed locations to the closest name in a fixed vocabulary.
+    """
+
+    def __init__(self, locations, threshold=MATCH_THRESHOLD, max_candidates=20, cache_size=4096, snapper=None, max_snap_km=MAX_SNAP_KM):
+        self.locations = list(locations)
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self.snapper = snapper
+        self.max_snap_km = max_snap_km
+
+        # Inverted index: trigram -> positions of the locations containing it
+        postings = {}
+        for position, location in enumerate(self.locations):
+            for gram in _trigrams(utils.full_process(location)):
+                postings.setdefault(gram, []).append(position)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        self.match = functools.lru_cache(maxsize=cache_size)(self._match)
+        self.resolve = functools.lru_cache(maxsize=cache_size)(self._resolve)
+
+    def candidates(self, input_location):
+        """
+        Returns the locations sharing the most trigrams with the input, in vocabulary order.
+        """
+        if len(self.locations) <= self.max_candidates:
+            return self.locations
+
+        hits = [self._postings[gram] for gram in _trigrams(utils.full_process(input_location)) if gram in self._postings]
+        if not hits:
+            return []
+
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.locations))
+        top = np.argpartition(-counts, self.max_candidates)[:self.max_candidates]
+        top = np.sort(top[counts[top] > 0])
+        return [self.locations[position] for position in top]
+
+    def _resolve(self, input_location):
+        """
+        Returns the canonical location for the input, or None if no match scores above the threshold
+        and the place cannot be snapped to a location within `max_snap_km`.
+        """
+        match = self.match(input_location)
+        if match is None or match[1] > self.max_snap_km:
+            return None
+        return match[0]
+
+    def _match(self, input_location):
+        """
+        Returns (location, snap distance in km) for the input: distance 0 for a name match, the distance to the
+        nearest location for a place known to the snapper (however far), or None.
+        """
+        location = self._fuzzy(input_location)
+        if location is not None:
+            return location, 0.0
+        if self.snapper is not None:
+            return self.snapper.snap(input_location)
+        return None
+
+    def _fuzzy(self, input_location):
+        """
+        Returns the location whose name matches the input above the threshold, or None.
+        """
+        candidates = self.candidates(input_location)
+        if not candidates:
+            return None
+
+        match, score = process.extractOne(input_location, candidates)
+        if score > self.threshold:  # Accept matches with a confidence score above the threshold
+            return match
+        else:
+            return None
+
+    def cache_info(self):
+        return self.resolve.cache_info()
+
+    def cache_clear(self):
+        self.match.cache_clear()
+        self.resolve.cache_clear()
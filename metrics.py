@@ -0,0 +1,162 @@
+# This file records how long each stage of a recommendation takes (LLM call,
+# JSON parsing, location matching, OD lookup, formatting), in histograms and
+# counters that can be exported in the Prometheus text format or as JSON lines.
+# When disabled, a span is a shared no-op context manager, so the instrumented
+# code pays almost nothing.
+
+
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Histogram:
+    """
+    Per-bucket (not cumulative) counts of observed durations, with their sum and count.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estimates the q-quantile as the upper bound of the bucket it falls in (None if empty).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class _Span:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """
+    Per-stage latency histograms and event counters, thread-safe.
+    """
+
+    def __init__(self, enabled=False, prefix="mewaywise"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        """
+        Context manager timing its block into the stage's histogram.
+        """
+        return _Span(self, stage) if self.enabled else _NULL_SPAN
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, counter, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def summary(self):
+        """
+        Returns {stage: {count, mean_ms, p50_ms, p99_ms}}, with bucket-bound quantiles.
+        """
+        with self._lock:
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "mean_ms": round(histogram.sum / histogram.count * 1000, 3),
+                    "p50_ms": histogram.quantile(0.50) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000,
+                }
+                for stage, histogram in self.histograms.items()
+            }
+
+    def to_prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        name = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {name} Time spent in each stage of a recommendation.", f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum!r}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            for counter, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {self.prefix}_{counter}_total counter")
+                lines.append(f"{self.prefix}_{counter}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self):
+        """
+        Returns one JSON object per histogram and counter, one per line, stamped with the current time.
+        """
+        timestamp = time.time()
+        lines = []
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                buckets = {"+Inf" if bound == float("inf") else repr(bound): count for bound, count in zip(histogram.buckets, histogram.counts)}
+                lines.append(json.dumps({"time": timestamp, "type": "histogram", "stage": stage, "count": histogram.count, "sum": histogram.sum, "buckets": buckets}))
+            for counter, value in sorted(self.counters.items()):
+                lines.append(json.dumps({"time": timestamp, "type": "counter", "name": counter, "value": value}))
+        return "".join(line + "\n" for line in lines)
+
+    def export(self, file_path):
+        """
+        Writes the metrics to a file: JSON lines (appended) for a `.jsonl` path, Prometheus text otherwise.
+        """
+        if file_path.endswith(".jsonl"):
+            with open(file_path, "a", encoding="utf-8") as f:
+                f.write(self.to_json_lines())
+        else:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
@@ -0,0 +1,168 @@
+# This file decides which model answers a query. Every query goes to the small
+# model first (llama-3.2-3b, fast) and is escalated to the large one (qwen2.5-32b)
+# only when the small model's answer fails validation: JSON that does not parse,
+# a null field, a priority the index does not know, or a location that matches
+# neither the dataset nor the gazetteer.
+# Per-model latencies and the escalation rate are recorded. The same routing loop
+# serves the blocking demo (`route_sync`) and the asyncio service (`route`).
+
+
+import json
+import threading
+import time
+
+from metrics import Histogram
+
+# Reasons for escalating to the next model
+UNPARSABLE = "unparsable"
+NULL_FIELD = "null_field"
+UNKNOWN_PRIORITY = "unknown_priority"
+UNMATCHED_LOCATION = "unmatched_location"
+ERROR = "error"
+
+
+def field_failure(field, value, resolve_origin, resolve_destination):
+    """
+    Checks one intent field as soon as it is known (`field` is "origin", "destination" or "priority").
+    Returns the failure reason, or None if the value is usable.
+    """
+    if value is None or value == "":
+        return NULL_FIELD
+    if field == "origin" and resolve_origin(value) is None:
+        return UNMATCHED_LOCATION
+    if field == "destination" and resolve_destination(value) is None:
+        return UNMATCHED_LOCATION
+    if field == "priority":
+        from od_index import PRIORITY_COLUMNS
+
+        if value not in PRIORITY_COLUMNS:
+            return UNKNOWN_PRIORITY
+    return None
+
+
+def validate_intent(llm_content, resolve_origin, resolve_destination):
+    """
+    Checks the intent JSON text of an LLM answer.
+    Returns the failure reason, or None if the intent can be used as is.
+    """
+    try:
+        intent = json.loads(llm_content)
+    except (json.JSONDecodeError, TypeError):
+        return UNPARSABLE
+    if not isinstance(intent, dict) or not isinstance(intent.get("preferences"), dict):
+        return NULL_FIELD
+
+    fields = {"origin": intent.get("origin"), "destination": intent.get("destination"), "priority": intent["preferences"].get("priority")}
+    if intent["preferences"].get("weights"):
+        # Weighted requests are ranked by their weights; the priority is optional
+        fields.pop("priority")
+    for field, value in fields.items():
+        failure = field_failure(field, value, resolve_origin, resolve_destination)
+        if failure is not None:
+            return failure
+    return None
+
+
+class ModelRouter:
+    """
+    Tries `models` in order (smallest first) and keeps per-model latency and failure statistics.
+    Escalations are also counted in `metrics` (a metrics.Metrics), if given.
+    """
+
+    def __init__(self, models, metrics=None):
+        self.models = list(models)
+        self.metrics = metrics
+        self.queries = 0
+        self.escalations = 0
+        self._latency = {model: Histogram() for model in self.models}
+        self._failures = {model: {} for model in self.models}
+        self._lock = threading.Lock()
+
+    def route_sync(self, ask):
+        """
+        Calls `ask(model, escalate)` -> (answer, failure reason or None) for each model in order,
+        until an answer passes validation or the last model has answered.
+        Returns (that answer, its failure reason or None), so a rejected last answer can be told apart.
+        """
+        for attempt, model in enumerate(self.models, 1):
+            escalate = attempt < len(self.models)
+            start = time.perf_counter()
+            try:
+                answer, failure = ask(model, escalate)
+            except Exception:
+                # e.g. the small model is not loaded: fall back to the next one
+                if not escalate:
+                    raise
+                answer, failure = None, ERROR
+            if self._settle(model, attempt, time.perf_counter() - start, failure):
+                return answer, failure
+
+    async def route(self, ask, slots=None):
+        """
+        Async version of `route_sync` for a coroutine function `ask`.
+        Each call holds one of `slots` (an asyncio.Semaphore), if given; the recorded latency excludes the wait for it.
+        """
+        for attempt, model in enumerate(self.models, 1):
+            escalate = attempt < len(self.models)
+            start = time.perf_counter()
+            try:
+                if slots is None:
+                    answer, failure = await ask(model, escalate)
+                else:
+                    async with slots:
+                        start = time.perf_counter()
+                        answer, failure = await ask(model, escalate)
+            except Exception:
+                if not escalate:
+                    raise
+                answer, failure = None, ERROR
+            if self._settle(model, attempt, time.perf_counter() - start, failure):
+                return answer, failure
+
+    def _settle(self, model, attempt, seconds, failure):
+        """
+        Records attempt number `attempt`, of `model`. Returns True if its answer is final, False to escalate.
+        """
+        self.record_attempt(model, seconds, failure)
+        if failure is None or attempt == len(self.models):
+            self.record_query(attempt)
+            return True
+        if self.metrics is not None:
+            self.metrics.inc("escalations")
+        return False
+
+    def record_attempt(self, model, seconds, failure=None):
+        """
+        Records one call of `model`, with the reason its answer was rejected (None if it was accepted).
+        """
+        with self._lock:
+            self._latency.setdefault(model, Histogram()).observe(seconds)
+            if failure is not None:
+                failures = self._failures.setdefault(model, {})
+                failures[failure] = failures.get(failure, 0) + 1
+
+    def record_query(self, attempts):
+        """
+        Records one query that needed `attempts` model calls.
+        """
+        with self._lock:
+            self.queries += 1
+            self.escalations += attempts > 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "escalations": self.escalations,
+                "escalation_rate": round(self.escalations / self.queries, 4) if self.queries else 0.0,
+                "models": {
+                    model: {
+                        "calls": histogram.count,
+                        "mean_ms": round(histogram.sum / histogram.count * 1000, 2) if histogram.count else None,
+                        "p50_ms": histogram.quantile(0.50) * 1000 if histogram.count else None,
+                        "p99_ms": histogram.quantile(0.99) * 1000 if histogram.count else None,
+                        "failures": dict(self._failures.get(model, {})),
+                    }
+                    for model, histogram in self._latency.items()
+                },
+            }
@@ -0,0 +1,365 @@
+# This file builds an in-memory index over the travel dataset.
+# Rows are grouped once by (origin, destination) and the best mode for every
+# user priority is computed ahead of time, so a recommendation becomes a
+# dictionary lookup instead of filtering and sorting the whole DataFrame.
+# Live cost updates only recompute the best modes of the OD pairs they touch.
+# The built index can be saved next to a compiled travel store and memory-mapped
+# back, so a process starts without grouping or sorting anything.
+
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Mapping between the user's priority and the cost column used to rank modes
+PRIORITY_COLUMNS = {
+    "lowest_cost": "fare_cost",
+    "minimal_walking": "energy_cost",
+    "shortest_time": "time_cost",
+    "least_environmental_cost": "co2_cost",
+}
+PRIORITIES = list(PRIORITY_COLUMNS)
+COST_COLUMNS = ["time_cost", "fare_cost", "co2_cost", "energy_cost"]
+
+# Position of each priority, and of its cost column in COST_COLUMNS
+PRIORITY_CODES = {priority: code for code, priority in enumerate(PRIORITIES)}
+PRIORITY_COST_INDEX = [COST_COLUMNS.index(PRIORITY_COLUMNS[priority]) for priority in PRIORITIES]
+
+# Arrays written by `ODIndex.save`, one .npy file each, and the file marking a complete index
+INDEX_ARRAYS = ["pair_keys", "pair_starts", "pair_ends", "pair_of_row", "mode_codes", "costs", "winner_rows"]
+INDEX_META = "index.json"
+
+
+class ODIndex:
+    """
+    Precomputed best travel mode per (origin, destination) pair and priority.
+    Reads and updates hold `lock`, so a lookup never sees half of an update batch.
+    """
+
+    def __init__(self, df):
+        frame = df.reset_index(drop=True)
+        self.lock = threading.RLock()
+        self._listeners = []
+
+        # Location vocabularies, in the same order as `df.<column>.unique()`
+        self.origins = list(frame["origin"].unique())
+        self.destinations = list(frame["destination"].unique())
+
+        # Rows stored contiguously per OD pair; the sort is stable so each pair keeps the dataset order
+        row_keys = self._od_keys(frame["origin"], frame["destination"])
+        order = np.argsort(row_keys, kind="stable")
+        self._pair_keys, self._pair_starts = np.unique(row_keys[order], return_index=True)
+        self._pair_ends = np.append(self._pair_starts[1:], len(order))
+        self._pair_of_row = np.repeat(np.arange(len(self._pair_keys)), self._pair_ends - self._pair_starts)
+
+        mode_codes, mode_names = pd.factorize(frame["mode"])
+        self._mode_codes = mode_codes[order]
+        self._init_lookups(list(mode_names))
+
+        # Costs in float64 (updates change them in place), and the dataset type of each column
+        self._costs = frame[COST_COLUMNS].to_numpy(dtype=np.float64)[order]
+        self._column_kinds = [
+            "int" if pd.api.types.is_integer_dtype(frame[column]) else "float32" if frame[column].dtype == np.float32 else "float"
+            for column in COST_COLUMNS
+        ]
+
+        # The winner of a pair is its first row in (cost, dataset order), like `nsmallest(1, ...)`,
+        # or -1 when the pair has no value for the priority (NaN sorts last)
+        self._winner_rows = np.full((len(self._pair_keys), len(PRIORITIES)), -1, dtype=np.int64)
+        for priority_code, cost_index in enumerate(PRIORITY_COST_INDEX):
+            values = self._costs[:, cost_index]
+            first = np.lexsort((values, self._pair_of_row))[self._pair_starts]
+            self._winner_rows[:, priority_code] = np.where(np.isnan(values[first]), -1, first)
+
+    def _init_lookups(self, mode_names):
+        """
+        Builds the name lookups derived from the vocabularies and the pair keys.
+        """
+        self._origin_codes = {name: code for code, name in enumerate(self.origins)}
+        self._destination_codes = {name: code for code, name in enumerate(self.destinations)}
+        self._pair_origins = np.asarray(self.origins, dtype=object)[self._pair_keys // len(self.destinations)]
+        self._pair_destinations = np.asarray(self.destinations, dtype=object)[self._pair_keys % len(self.destinations)]
+        self._mode_names = np.asarray(mode_names, dtype=object)
+        self._mode_ids = {name: code for code, name in enumerate(mode_names)}
+
+    def save(self, index_path):
+        """
+        Writes the index to a directory, for `ODIndex.load`. The metadata file is written last,
+        so an interrupted save leaves no index that looks complete.
+        """
+        os.makedirs(index_path, exist_ok=True)
+        meta_path = os.path.join(index_path, INDEX_META)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        with self.lock:
+            for name in INDEX_ARRAYS:
+                np.save(os.path.join(index_path, f"{name}.npy"), getattr(self, f"_{name}"))
+            meta = {
+                "origins": self.origins,
+                "destinations": self.destinations,
+                "modes": self._mode_names.tolist(),
+                "column_kinds": self._column_kinds,
+            }
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, index_path):
+        """
+        Memory-maps an index written by `save`. The arrays are copy-on-write: processes share
+        their pages, and a live update only copies the pages it changes.
+        """
+        with open(os.path.join(index_path, INDEX_META), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        index = cls.__new__(cls)
+        index.lock = threading.RLock()
+        index._listeners = []
+        index.origins = meta["origins"]
+        index.destinations = meta["destinations"]
+        index._column_kinds = meta["column_kinds"]
+        for name in INDEX_ARRAYS:
+            array = np.load(os.path.join(index_path, f"{name}.npy"), mmap_mode="c")
+            setattr(index, f"_{name}", array.view(np.ndarray))
+        index._init_lookups(meta["modes"])
+        return index
+
+    def _slot(self, origin, destination):
+        """
+        Returns the position of the OD pair among the pairs, or None if it is not in the dataset.
+        """
+        origin_code = self._origin_codes.get(origin)
+        destination_code = self._destination_codes.get(destination)
+        if origin_code is None or destination_code is None:
+            return None
+        key = origin_code * len(self.destinations) + destination_code
+        slot = int(np.searchsorted(self._pair_keys, key))
+        if slot == len(self._pair_keys) or self._pair_keys[slot] != key:
+            return None
+        return slot
+
+    def _od_keys(self, origins, destinations):
+        """
+        Encodes origin/destination names as one integer key per pair (-1 if either name is unknown).
+        """
+        origin_codes = pd.Categorical(origins, categories=self.origins).codes.astype(np.int64)
+        destination_codes = pd.Categorical(destinations, categories=self.destinations).codes.astype(np.int64)
+        keys = origin_codes * len(self.destinations) + destination_codes
+        keys[(origin_codes < 0) | (destination_codes < 0)] = -1
+        return keys
+
+    def _value(self, cost_index, value):
+        """
+        Converts a stored cost back to a plain Python value of the column's dataset type.
+        """
+        kind = self._column_kinds[cost_index]
+        if kind == "int" and value.is_integer():
+            return int(value)
+        if kind == "float32":
+            # float32 costs (from a compiled travel store) are widened through their shortest
+            # representation, so that 14.63 stays 14.63 instead of 14.630000114440918
+            return float(str(np.float32(value)))
+        return float(value)
+
+    def _record(self, row):
+        """
+        Returns the row at the given (sorted) position as a dict of plain Python values.
+        """
+        slot = self._pair_of_row[row]
+        record = {
+            "origin": self._pair_origins[slot],
+            "destination": self._pair_destinations[slot],
+            "mode": self._mode_names[self._mode_codes[row]],
+        }
+        for cost_index, column in enumerate(COST_COLUMNS):
+            record[column] = self._value(cost_index, self._costs[row, cost_index])
+        return record
+
+    def __len__(self):
+        return len(self._pair_keys)
+
+    def __contains__(self, od_pair):
+        return self._slot(*od_pair) is not None
+
+    def best_mode(self, origin, destination, priority):
+        """
+        Returns the row (as a dict) of the best mode for the OD pair and priority,
+        or None when the pair is not in the dataset or has no value for that priority.
+        """
+        slot = self._slot(origin, destination)
+        if slot is None or priority not in PRIORITY_CODES:
+            return None
+
+        with self.lock:
+            row = self._winner_rows[slot, PRIORITY_CODES[priority]]
+            return self._record(row) if row >= 0 else None
+
+    def pair_costs(self, origin, destination):
+        """
+        Returns the row positions of every mode of the OD pair and their costs as an
+        array with one column per entry of COST_COLUMNS, or None if the pair is unknown.
+        """
+        slot = self._slot(origin, destination)
+        if slot is None:
+            return None
+
+        start, end = self._pair_starts[slot], self._pair_ends[slot]
+        with self.lock:
+            return np.arange(start, end), self._costs[start:end].copy()
+
+    def pair_winners(self, priority):
+        """
+        Returns aligned arrays with the origin, destination and winning cost (in the priority's
+        column) of every OD pair that has a best mode for the priority.
+        """
+        priority_code = PRIORITY_CODES[priority]
+        with self.lock:
+            rows = self._winner_rows[:, priority_code]
+            has_winner = rows >= 0
+            costs = self._costs[rows[has_winner], PRIORITY_COST_INDEX[priority_code]]
+        return self._pair_origins[has_winner], self._pair_destinations[has_winner], costs
+
+    def records(self, positions):
+        """
+        Returns the rows at the given positions (as returned by `pair_costs`) as dicts.
+        """
+        with self.lock:
+            return [self._record(row) for row in positions]
+
+    def recommend_batch(self, queries, resolve_origin=None, resolve_destination=None):
+        """
+        Recommends the best mode for many (origin, destination, priority) queries at once.
+        `queries` is a DataFrame (or dict of arrays) with those three columns; the optional
+        resolvers map raw location strings to dataset names, and are called once per unique string.
+        Returns one row per query with `status`/`message` columns in place of the error dicts
+        of `fetch_recommended_mode`, the matched OD pair and the recommended mode row.
+        """
+        queries = pd.DataFrame(queries)
+        origins = _resolve_unique(queries["origin"], resolve_origin)
+        destinations = _resolve_unique(queries["destination"], resolve_destination)
+
+        keys = self._od_keys(origins, destinations)
+        slots = np.searchsorted(self._pair_keys, keys)
+        slots[slots == len(self._pair_keys)] = 0
+        has_pair = (keys >= 0) & (self._pair_keys[slots] == keys)
+
+        priority_codes = pd.Categorical(queries["priority"], categories=PRIORITIES).codes.astype(np.int64)
+        with self.lock:
+            rows = self._winner_rows[slots, np.maximum(priority_codes, 0)]
+            found = has_pair & (priority_codes >= 0) & (rows >= 0)
+            rows = np.where(found, rows, 0)
+            modes = self._mode_names[self._mode_codes[rows]]
+            costs = self._costs[rows]
+
+        # Same checks, in the same order, as `fetch_recommended_mode`
+        message = np.select(
+            [keys < 0, ~has_pair, priority_codes < 0, ~found],
+            [
+                "Origin or destination could not be matched.",
+                "No data available for the selected OD pair.",
+                "Unknown preference priority.",
+                "No data available for the selected OD pair.",
+            ],
+            default="",
+        )
+
+        result = pd.DataFrame({
+            "origin": queries["origin"].to_numpy(),
+            "destination": queries["destination"].to_numpy(),
+            "priority": queries["priority"].to_numpy(),
+            "status": np.where(found, "success", "error"),
+            "message": np.where(found, None, message),
+            "matched_origin": origins.to_numpy(),
+            "matched_destination": destinations.to_numpy(),
+            "mode": np.where(found, modes, None),
+        }, index=queries.index)
+        for cost_index, column in enumerate(COST_COLUMNS):
+            values = np.where(found, costs[:, cost_index], np.nan)
+            if self._column_kinds[cost_index] == "float32":
+                # Widen each distinct value once, as `_value` does
+                distinct, inverse = np.unique(values, return_inverse=True)
+                values = distinct.astype(np.float32).astype(str).astype(np.float64)[inverse]
+            result[column] = values
+        return result
+
+    def add_listener(self, callback):
+        """
+        Registers `callback(changed_pairs)`, called under `lock` with the set of
+        (origin, destination) pairs changed by each `apply_updates` batch.
+        """
+        self._listeners.append(callback)
+
+    def apply_updates(self, updates):
+        """
+        Applies live cost changes to existing rows and recomputes the best modes of the touched OD pairs.
+        Each update is a dict with `origin`, `destination`, `mode` and the new value of any COST_COLUMNS.
+        Returns the number of updates applied and the list of rejected ones (unknown row or no valid cost).
+        """
+        changes = []
+        rejected = []
+        for update in updates:
+            row = self._find_row(update.get("origin"), update.get("destination"), update.get("mode"))
+            try:
+                values = {cost_index: float(update[column]) for cost_index, column in enumerate(COST_COLUMNS) if column in update}
+            except (TypeError, ValueError):
+                values = {}
+            if row is None or not values:
+                rejected.append(update)
+            else:
+                changes.append((row, values))
+
+        if not changes:
+            return 0, rejected
+
+        # The whole batch is applied at once, so lookups see either none or all of it
+        with self.lock:
+            changed_slots = set()
+            for row, values in changes:
+                for cost_index, value in values.items():
+                    self._costs[row, cost_index] = value
+                changed_slots.add(self._pair_of_row[row])
+            for slot in changed_slots:
+                self._refresh_winners(slot)
+
+            changed_pairs = {(self._pair_origins[slot], self._pair_destinations[slot]) for slot in changed_slots}
+            for callback in self._listeners:
+                callback(changed_pairs)
+        return len(changes), rejected
+
+    def _find_row(self, origin, destination, mode):
+        """
+        Returns the position of the OD pair's row for the mode, or None if there is no such row.
+        """
+        slot = self._slot(origin, destination)
+        mode_code = self._mode_ids.get(mode)
+        if slot is None or mode_code is None:
+            return None
+
+        start, end = self._pair_starts[slot], self._pair_ends[slot]
+        matches = np.flatnonzero(self._mode_codes[start:end] == mode_code)
+        return start + int(matches[0]) if len(matches) else None
+
+    def _refresh_winners(self, slot):
+        """
+        Recomputes the winning row of every priority for one OD pair.
+        """
+        start, end = self._pair_starts[slot], self._pair_ends[slot]
+        for priority_code, cost_index in enumerate(PRIORITY_COST_INDEX):
+            values = self._costs[start:end, cost_index]
+            # nanargmin returns the first minimum, the same tie-break as at construction
+            self._winner_rows[slot, priority_code] = -1 if np.isnan(values).all() else start + int(np.nanargmin(values))
+
+
+def _resolve_unique(locations, resolve):
+    """
+    Applies `resolve` once per distinct location string and broadcasts the results back.
+    """
+    locations = pd.Series(locations).reset_index(drop=True)
+    if resolve is None:
+        return locations
+    codes, uniques = pd.factorize(locations)
+    resolved = np.array([resolve(location) for location in uniques] + [None], dtype=object)
+    return pd.Series(resolved[codes], dtype=object)
@@ -0,0 +1,151 @@
+# This file implements a multi-leg route planner over the travel dataset.
+# Locations are nodes and every OD pair is an edge weighted by the cost of its
+# best mode for the selected priority, so trips without a direct row in the
+# dataset can still be answered by chaining legs (possibly switching modes).
+# Live cost updates of the index are applied to the edge weights in place.
+
+
+import functools
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from od_index import COST_COLUMNS, PRIORITIES, PRIORITY_COLUMNS
+
+
+class RoutePlanner:
+    """
+    Shortest multi-leg itineraries per priority, using Dijkstra over a compact (CSR) adjacency structure.
+    """
+
+    def __init__(self, od_index, cache_size=1024):
+        self.od_index = od_index
+        self.nodes = list(dict.fromkeys(od_index.origins + od_index.destinations))
+        self._node_ids = {name: node for node, name in enumerate(self.nodes)}
+        self._node_index = pd.Index(self.nodes)
+        # Graphs are built on first use, as most queries have a direct row and never need one
+        self._graphs = {}
+
+        # Cached itineraries are keyed by the graph version, so none computed before an update is reused
+        self._version = 0
+        self._cached_plan = functools.lru_cache(maxsize=cache_size)(self._plan)
+        od_index.add_listener(self._update_edges)
+
+    def _build_graph(self, priority):
+        """
+        Builds the graph of a priority: only the best mode of each OD pair can be on a shortest path.
+        """
+        origins, destinations, costs = self.od_index.pair_winners(priority)
+        sources = self._node_index.get_indexer(origins)
+        order = np.argsort(sources, kind="stable")
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=len(self.nodes)))])
+        targets = self._node_index.get_indexer(destinations)[order]
+        # Plain lists are much faster than NumPy scalars inside the Python search loop
+        return indptr.tolist(), targets.tolist(), costs[order].tolist()
+
+    def _graph(self, priority):
+        """
+        Returns the graph of a priority, building it on first use (call under the index lock).
+        """
+        graph = self._graphs.get(priority)
+        if graph is None:
+            graph = self._graphs[priority] = self._build_graph(priority)
+        return graph
+
+    def _update_edges(self, changed_pairs):
+        """
+        Refreshes the weights of the edges of OD pairs whose costs changed (called by the index under its lock).
+        Graphs not built yet will be built from the updated costs.
+        """
+        for priority, (indptr, targets, weights) in list(self._graphs.items()):
+            for origin, destination in changed_pairs:
+                source = self._node_ids[origin]
+                target = self._node_ids[destination]
+                best = self.od_index.best_mode(origin, destination, priority)
+                # A pair left without a value for the priority can no longer be used
+                weight = float(best[PRIORITY_COLUMNS[priority]]) if best is not None else float("inf")
+                edge = next((edge for edge in range(indptr[source], indptr[source + 1]) if targets[edge] == target), None)
+                if edge is not None:
+                    weights[edge] = weight
+                elif best is not None:
+                    # The pair had no value for this priority before: its edge must be added
+                    self._graphs[priority] = self._build_graph(priority)
+                    break
+        self._version += 1
+        self._cached_plan.cache_clear()
+
+    def plan(self, origin, destination, priority):
+        """
+        Returns a multi-leg itinerary between two locations for the priority (see `_plan`), cached.
+        """
+        return self._cached_plan(origin, destination, priority, self._version)
+
+    def shortest_path(self, origin, destination, priority):
+        """
+        Returns the list of locations on the cheapest path for the priority, or None if unreachable.
+        """
+        source = self._node_ids.get(origin)
+        target = self._node_ids.get(destination)
+        if source is None or target is None or priority not in PRIORITIES:
+            return None
+
+        with self.od_index.lock:
+            return self._search(source, target, self._graph(priority))
+
+    def _search(self, source, target, graph):
+        """
+        Dijkstra from `source`, stopping as soon as `target` is settled.
+        """
+        indptr, targets, weights = graph
+        distances = {source: 0.0}
+        previous = {}
+        visited = set()
+        heap = [(0.0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if node in visited:
+                continue
+            if node == target:
+                break
+            visited.add(node)
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = targets[edge]
+                candidate = distance + weights[edge]
+                if candidate < distances.get(neighbour, float("inf")):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = node
+                    heapq.heappush(heap, (candidate, neighbour))
+
+        if target not in previous:
+            return None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        return [self.nodes[node] for node in reversed(path)]
+
+    def _plan(self, origin, destination, priority, version=None):
+        """
+        Returns a multi-leg itinerary between two locations for the priority, or None if there is none.
+        The itinerary has the same keys as a dataset row (with costs summed over the legs),
+        plus the list of `legs` and the number of `mode_switches`. `version` only keys the cache.
+        """
+        # Path and legs are read under the same lock, so an update cannot land in between
+        with self.od_index.lock:
+            path = self.shortest_path(origin, destination, priority)
+            if path is None:
+                return None
+            legs = [self.od_index.best_mode(start, end, priority) for start, end in zip(path, path[1:])]
+
+        itinerary = {
+            "origin": origin,
+            "destination": destination,
+            "mode": " -> ".join(leg["mode"] for leg in legs),
+        }
+        for column in COST_COLUMNS:
+            total = sum(leg[column] for leg in legs)
+            itinerary[column] = round(total, 2) if isinstance(total, float) else total
+        itinerary["legs"] = legs
+        itinerary["mode_switches"] = sum(1 for before, after in zip(legs, legs[1:]) if before["mode"] != after["mode"])
+        return itinerary
@@ -0,0 +1,85 @@
+# This file implements a multi-criteria scoring engine for travel modes.
+# Instead of ranking by the single column chosen by the user's priority, every
+# mode of an OD pair is scored against a weight vector over the four costs, and
+# the Pareto-optimal (non-dominated) modes can be returned as well.
+
+
+import numpy as np
+
+from od_index import COST_COLUMNS
+
+
+def normalize_weights(weights):
+    """
+    Turns a {cost column: weight} dict into a weight vector ordered like COST_COLUMNS and summing to 1.
+    """
+    unknown = set(weights) - set(COST_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown cost weights: {', '.join(sorted(unknown))}.")
+
+    vector = np.array([float(weights.get(column) or 0) for column in COST_COLUMNS])
+    if (vector < 0).any() or vector.sum() == 0:
+        raise ValueError("Weights must be non-negative and not all zero.")
+    return vector / vector.sum()
+
+
+def normalize_costs(costs):
+    """
+    Min-max normalizes each cost column of an OD pair to [0, 1]; missing values count as the worst.
+    """
+    low = np.nanmin(costs, axis=0)
+    span = np.nanmax(costs, axis=0) - low
+    normalized = np.divide(costs - low, span, out=np.zeros_like(costs), where=span > 0)
+    return np.nan_to_num(normalized, nan=1.0)
+
+
+def pareto_mask(costs):
+    """
+    Flags the rows not dominated by any other row (no worse on every cost and better on one).
+    """
+    no_worse = (costs[:, None, :] <= costs[None, :, :]).all(axis=2)
+    better = (costs[:, None, :] < costs[None, :, :]).any(axis=2)
+    dominated = (no_worse & better).any(axis=0)
+    return ~dominated
+
+
+class MultiCriteriaScorer:
+    """
+    Ranks the modes of an OD pair by a weighted sum of their normalized costs.
+    Costs and rows are read under the index's lock, so an update never lands between them;
+    callers can hold `od_index.lock` across several calls for one snapshot.
+    """
+
+    def __init__(self, od_index):
+        self.od_index = od_index
+
+    def rank(self, origin, destination, weights, top_k=3):
+        """
+        Returns the `top_k` modes with the lowest weighted score (each with a `score` key),
+        or None when the OD pair is not in the dataset.
+        """
+        weights = normalize_weights(weights)
+        with self.od_index.lock:
+            pair = self.od_index.pair_costs(origin, destination)
+            if pair is None:
+                return None
+
+            positions, costs = pair
+            scores = normalize_costs(costs) @ weights
+            best = np.argsort(scores, kind="stable")[:top_k]
+            ranked = self.od_index.records(positions[best])
+        for record, score in zip(ranked, scores[best]):
+            record["score"] = round(float(score), 4)
+        return ranked
+
+    def pareto_front(self, origin, destination):
+        """
+        Returns the Pareto-optimal modes of the OD pair, or None when the pair is not in the dataset.
+        """
+        with self.od_index.lock:
+            pair = self.od_index.pair_costs(origin, destination)
+            if pair is None:
+                return None
+
+            positions, costs = pair
+            return self.od_index.records(positions[pareto_mask(costs)])
@@ -0,0 +1,189 @@
+# This file serves the travel recommender as a long-running asyncio HTTP service.
+# Many clients share one loaded model: LLM calls go through a single pooled async
+# client and a concurrency limit, and requests beyond `max_pending` are rejected
+# with 503 instead of piling up (backpressure). Location matching and OD lookups
+# are CPU-bound, so they run on a small thread pool and never stall the event loop.
+#
+# Usage: python service.py --port 8080 --llm-url http://127.0.0.1:1234/v1
+#   POST /recommend {"query": "cheapest way from Central park to NYU tandon"}
+#   POST /recommend {"origin": "...", "destination": "...", "preferences": {"priority": "..."}}
+#   GET  /health
+#   GET  /metrics   (per-stage latency histograms, Prometheus text format; needs --metrics)
+
+
+import argparse
+import asyncio
+import concurrent.futures
+import time
+
+from openai import AsyncOpenAI
+
+import demo
+from http_server import connection_handler
+from model_router import ModelRouter, validate_intent
+
+
+class RecommendationService:
+    """
+    Handles recommendation requests: intent extraction (fast path, cache or LLM), then OD lookup.
+    """
+
+    def __init__(self, llm_url=demo.LM_STUDIO_URL, models=None, llm_concurrency=4, max_pending=512, lookup_workers=4):
+        # One client for the whole service, so HTTP connections to LM Studio are pooled and reused
+        self.client = AsyncOpenAI(base_url=llm_url, api_key="lm-studio")
+        # Models asked for the intent, smallest first; each call holds one of `llm_slots`
+        self.router = ModelRouter(models or demo.intent_models(), demo.metrics)
+        self.llm_slots = asyncio.Semaphore(llm_concurrency)
+        # Threads for the blocking work: fuzzy matching, route planning, lookups
+        self.lookups = concurrent.futures.ThreadPoolExecutor(max_workers=lookup_workers, thread_name_prefix="lookup")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.served = 0
+        self.rejected = 0
+
+    async def extract_intent(self, user_input):
+        """
+        Async version of `demo.extract_intent`.
+        """
+        cached_intent = await self.run_blocking(demo.local_intent, user_input)
+        if cached_intent is not None:
+            return cached_intent, None, False
+
+        llm_content, failure = await self.router.route(lambda model, escalate: self.ask_intent(user_input, model), self.llm_slots)
+
+        parsed_input, error_message = demo.parse_intent(llm_content)
+        return parsed_input, error_message, parsed_input is not None and failure is None
+
+    async def ask_intent(self, user_input, model):
+        """
+        Async version of `demo.ask_intent`, through the pooled client.
+        """
+        demo.metrics.inc("llm_calls")
+        start = time.perf_counter()
+        response = await self.client.chat.completions.create(**demo.intent_request(user_input, model))
+        demo.metrics.observe("llm_first_token", time.perf_counter() - start)
+        demo.metrics.observe("llm_total", time.perf_counter() - start)
+        demo.record_usage(response.usage)
+        llm_content = demo.intent_text(response.choices[0].message)
+        return llm_content, await self.run_blocking(validate_intent, llm_content, demo.origin_resolver.match, demo.destination_resolver.match)
+
+    async def run_blocking(self, function, *args):
+        """
+        Runs `function(*args)` on the lookup threads and returns its result.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.lookups, function, *args)
+
+    async def recommend(self, payload):
+        """
+        Returns the result of `fetch_recommended_mode` for a free-text query or a structured request.
+        """
+        demo.metrics.inc("queries")
+        start = time.perf_counter()
+        try:
+            cacheable = False
+            if "query" in payload:
+                intent, error_message, cacheable = await self.extract_intent(str(payload["query"]))
+                if intent is None:
+                    demo.metrics.inc("errors")
+                    return {"status": "error", "message": error_message}
+            else:
+                intent = payload
+
+            if not intent.get("origin") or not intent.get("destination") or not isinstance(intent.get("preferences"), dict):
+                demo.metrics.inc("errors")
+                return {"status": "error", "message": "Origin, destination and preferences are required."}
+
+            result = await self.run_blocking(demo.fetch_recommended_mode, intent["origin"], intent["destination"], intent["preferences"])
+            if result["status"] != "success":
+                demo.metrics.inc("errors")
+            elif cacheable:
+                demo.intent_cache.put(str(payload["query"]), intent)
+            return {**result, "intent": intent}
+        finally:
+            demo.metrics.observe("query", time.perf_counter() - start)
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "served": self.served,
+            "rejected": self.rejected,
+            "intent_cache": demo.intent_cache.stats(),
+            "fast_path": demo.fast_parser.stats() if demo.fast_parser else {},
+            "routing": self.router.stats(),
+        }
+
+    async def handle(self, request):
+        if request.path == "/health":
+            return 200, {"status": "ok", **self.stats()}
+        if request.path == "/metrics":
+            return 200, demo.metrics.to_prometheus(), "text/plain; version=0.0.4"
+        if request.path != "/recommend":
+            return 404, {"status": "error", "message": f"Unknown endpoint {request.path}."}
+        if request.method != "POST":
+            return 405, {"status": "error", "message": "Use POST."}
+
+        # Backpressure: refuse new work instead of queueing without bound
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return 503, {"status": "error", "message": "Server busy, please retry later."}
+
+        self.pending += 1
+        try:
+            try:
+                payload = request.json()
+            except ValueError:
+                return 400, {"status": "error", "message": "Request body must be JSON."}
+            if not isinstance(payload, dict):
+                return 400, {"status": "error", "message": "Request body must be a JSON object."}
+
+            try:
+                result = await self.recommend(payload)
+            except Exception as e:
+                return 500, {"status": "error", "message": str(e)}
+            self.served += 1
+            return 200, result
+        finally:
+            self.pending -= 1
+
+
+async def start_service(host="127.0.0.1", port=8080, **options):
+    """
+    Starts the service and returns (server, service); port 0 picks a free port.
+    """
+    # Load the dataset before accepting connections, not on the first request
+    demo.load_data()
+    service = RecommendationService(**options)
+    server = await asyncio.start_server(connection_handler(service.handle), host, port, backlog=1024)
+    return server, service
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MeWayWise recommendation service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--llm-url", default=demo.LM_STUDIO_URL, help="OpenAI-compatible endpoint (LM Studio or lmstudio_stub.py).")
+    parser.add_argument("--model", default=demo.MODEL, help="Large model, used when the small one's answer fails validation.")
+    parser.add_argument("--small-model", default=demo.SMALL_MODEL, help="Model asked first for every query.")
+    parser.add_argument("--no-routing", action="store_true", help="Ask only --model.")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Maximum LLM calls in flight.")
+    parser.add_argument("--max-pending", type=int, default=512, help="Requests in flight before answering 503.")
+    parser.add_argument("--lookup-workers", type=int, default=4, help="Threads for location matching and OD lookups.")
+    parser.add_argument("--metrics", action="store_true", help="Record per-stage latencies, served on /metrics.")
+    parser.add_argument("--intent-mode", choices=["json", "tool"], default=demo.INTENT_MODE, help="Free-text JSON or TRAVEL_TOOL calls.")
+    args = parser.parse_args()
+
+    demo.metrics.enabled = args.metrics
+    demo.INTENT_MODE = args.intent_mode
+
+    models = [args.model] if args.no_routing or args.small_model == args.model else [args.small_model, args.model]
+    server, _ = await start_service(
+        args.host, args.port, llm_url=args.llm_url, models=models,
+        llm_concurrency=args.llm_concurrency, max_pending=args.max_pending, lookup_workers=args.lookup_workers,
+    )
+    print(f"Recommendation service listening on http://{args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
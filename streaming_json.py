@@ -0,0 +1,109 @@
+# This file implements an incremental JSON parser for streamed LLM output.
+# Text is fed chunk by chunk as tokens arrive, and every scalar field is reported
+# as soon as its value is complete, so work on it can start before the model has
+# finished generating the whole object.
+
+
+import json
+
+LITERAL_CHARS = set("-+.0123456789eEtrufalsn")
+
+# Value reported (with `report_object_ends`) when a nested object closes
+OBJECT_END = object()
+
+
+class StreamingJSONParser:
+    """
+    Reports (path, value) for each completed scalar of a JSON object, e.g. (("preferences", "priority"), "lowest_cost").
+    Text before the first `{` (such as a code fence) is ignored.
+    With `report_object_ends`, (path, OBJECT_END) is also reported when a nested object closes.
+    With `report_containers`, (path, {}) or (path, []) is also reported when a nested object or array opens,
+    so that, with the scalars inside it, the value can be rebuilt as `json.loads` would return it.
+    """
+
+    def __init__(self, report_object_ends=False, report_containers=False):
+        self.report_object_ends = report_object_ends
+        self.report_containers = report_containers
+        self.done = False
+        self._started = False
+        self._stack = []  # one [kind, key or index, expecting_key] per open object/array
+        self._string = None  # raw characters of the string being read
+        self._escaped = False
+        self._literal = ""
+
+    def feed(self, text):
+        """
+        Consumes a chunk of text and returns the list of (path, value) completed by it.
+        Raises ValueError on malformed JSON.
+        """
+        events = []
+        for char in text:
+            if self.done:
+                break
+            if self._string is not None:
+                self._read_string(char, events)
+            elif not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append(["object", None, True])
+            else:
+                self._read_structure(char, events)
+        return events
+
+    def _path(self):
+        return tuple(frame[1] for frame in self._stack)
+
+    def _read_string(self, char, events):
+        if self._escaped:
+            self._escaped = False
+        elif char == "\\":
+            self._escaped = True
+        elif char == '"':
+            value = json.loads('"' + "".join(self._string) + '"')
+            self._string = None
+            frame = self._stack[-1]
+            if frame[0] == "object" and frame[2]:
+                frame[1] = value
+                frame[2] = False
+            else:
+                events.append((self._path(), value))
+            return
+        self._string.append(char)
+
+    def _flush_literal(self, events):
+        if self._literal:
+            events.append((self._path(), json.loads(self._literal)))
+            self._literal = ""
+
+    def _read_structure(self, char, events):
+        if char in LITERAL_CHARS:
+            self._literal += char
+            return
+
+        self._flush_literal(events)
+        if char.isspace() or char == ":":
+            return
+        if char == '"':
+            self._string = []
+        elif char == "{":
+            if self.report_containers:
+                events.append((self._path(), {}))
+            self._stack.append(["object", None, True])
+        elif char == "[":
+            if self.report_containers:
+                events.append((self._path(), []))
+            self._stack.append(["array", 0, False])
+        elif char == ",":
+            frame = self._stack[-1]
+            if frame[0] == "array":
+                frame[1] += 1
+            else:
+                frame[2] = True
+        elif char in "}]":
+            frame = self._stack.pop()
+            if not self._stack:
+                self.done = True
+            elif self.report_object_ends and frame[0] == "object":
+                events.append((self._path(), OBJECT_END))
+        else:
+            raise ValueError(f"Unexpected character {char!r} in JSON stream.")
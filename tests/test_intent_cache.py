@@ -0,0 +1,114 @@
+# Tests of intent_cache.py and of what the chat pipeline stores in it: only intents
+# that passed validation and produced a recommendation, so a rejected LLM answer is
+# asked again on the next try. The LLM is lmstudio_stub.py in a background loop.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import demo
+from intent_cache import IntentCache
+from lmstudio_stub import start_stub
+
+# No priority word, so the fast path leaves this query to the (stub) LLM
+QUERY = "How do I get from Central Park to NYU Tandon?"
+
+
+class IntentCacheFileTest(unittest.TestCase):
+    def cache_from(self, content):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "intent_cache.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            return IntentCache(path=path)
+
+    def test_saved_entries_are_loaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "intent_cache.json")
+            cache = IntentCache(path=path)
+            cache.put(QUERY, {"origin": "Central Park"})
+            cache.save()
+            self.assertEqual(IntentCache(path=path).get(QUERY), {"origin": "Central Park"})
+
+    def test_corrupt_file_starts_empty(self):
+        for content in ['{"query": [1', "[1, 2]", '{"query": 3}', '{"query": ["soon", {}]}']:
+            self.assertEqual(len(self.cache_from(content)), 0)
+
+
+class PipelineCachingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        demo.path = REPO_ROOT + os.sep
+        demo.LIVE_UPDATES = False
+        demo.ROUTE_MODELS = False
+        demo.od_index = None
+        cls.loop = asyncio.new_event_loop()
+        cls.server, cls.stub = cls.loop.run_until_complete(start_stub(port=0))
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        cls.llm_url = demo.LM_STUDIO_URL
+        demo.LM_STUDIO_URL = f"http://127.0.0.1:{cls.server.sockets[0].getsockname()[1]}/v1"
+        demo.client = None
+
+    @classmethod
+    def tearDownClass(cls):
+        demo.client.close()
+        demo.client = None
+        demo.LM_STUDIO_URL = cls.llm_url
+        cls.server.close()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+
+    def setUp(self):
+        demo.intent_cache = IntentCache()
+        demo.model_router = None
+
+    def tearDown(self):
+        self.stub.__dict__.pop("intent", None)
+
+    def null_priority(self, query, null_rate=0.0):
+        intent = type(self.stub).intent(self.stub, query)
+        intent["preferences"]["priority"] = None
+        return intent
+
+    def check_rejected_answer_is_not_cached(self):
+        # Every answer of the stub has a null priority: the query fails and is asked again
+        self.stub.intent = self.null_priority
+        for _ in range(2):
+            requests = self.stub.requests
+            _, result = demo.answer_query(QUERY)
+            self.assertEqual(result["status"], "error")
+            self.assertEqual(self.stub.requests, requests + 1)
+        self.assertEqual(len(demo.intent_cache), 0)
+
+        # Once the model answers correctly, the intent is cached and reused
+        del self.stub.intent
+        _, result = demo.answer_query(QUERY)
+        self.assertEqual(result["status"], "success")
+        requests = self.stub.requests
+        _, result = demo.answer_query(QUERY)
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(self.stub.requests, requests)
+
+    def test_rejected_answer_is_not_cached(self):
+        demo.STREAM_INTENT = False
+        self.check_rejected_answer_is_not_cached()
+
+    def test_rejected_streamed_answer_is_not_cached(self):
+        demo.STREAM_INTENT = True
+        self.check_rejected_answer_is_not_cached()
+
+
+if __name__ == "__main__":
+    unittest.main()
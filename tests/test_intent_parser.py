@@ -0,0 +1,75 @@
+# Tests of intent_parser.py: the fast path must read the common phrasings right
+# ("shortest walk" is about walking) and never take a priority from a place name.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import os
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from intent_parser import FAST_PATH_CONFIDENCE, FastPathParser
+from location_resolver import LocationResolver
+
+DATASET_LOCATIONS = ["Central_Park", "Times_Square", "NYU_Tandon", "Brooklyn_Bridge"]
+# Place names made of priority words
+TRICKY_LOCATIONS = ["Quick_Stop_Market", "Fast_Lane_Plaza", "Green_Point", "Cheap_Street"]
+
+
+def make_parser(locations):
+    return FastPathParser(LocationResolver(locations), LocationResolver(locations))
+
+
+class FastPathParserTest(unittest.TestCase):
+    def assert_parsed(self, parser, query, origin, destination, priority):
+        intent, confidence = parser.parse(query)
+        self.assertEqual(intent, {"origin": origin, "destination": destination, "preferences": {"priority": priority}}, query)
+        self.assertEqual(confidence, 1.0 if priority else 0.5, query)
+
+    def test_common_phrasings(self):
+        parser = make_parser(DATASET_LOCATIONS)
+        cases = [
+            ("what is the cheapest way from Central park to NYU tandon?", "lowest_cost"),
+            ("what is the fastest way from central park to nyu tandon?", "shortest_time"),
+            ("shortest route from Central park to NYU tandon", "shortest_time"),
+            ("greenest way from Central park to NYU tandon", "least_environmental_cost"),
+            ("I have luggage, how do I go from Central park to NYU tandon?", "minimal_walking"),
+        ]
+        for query, priority in cases:
+            self.assert_parsed(parser, query, "Central_Park", "NYU_Tandon", priority)
+
+    def test_shortest_walk_means_walking(self):
+        parser = make_parser(DATASET_LOCATIONS)
+        for query in [
+            "shortest walking distance from Central park to NYU tandon",
+            "route with the shortest walk from Central park to NYU tandon",
+            "least walking from Central park to NYU tandon",
+        ]:
+            self.assert_parsed(parser, query, "Central_Park", "NYU_Tandon", "minimal_walking")
+
+    def test_shortest_distance_is_left_to_the_llm(self):
+        intent, confidence = make_parser(DATASET_LOCATIONS).parse("shortest distance from Central park to NYU tandon")
+        self.assertIsNone(intent["preferences"]["priority"])
+        self.assertLess(confidence, FAST_PATH_CONFIDENCE)
+
+    def test_place_names_do_not_set_the_priority(self):
+        parser = make_parser(TRICKY_LOCATIONS)
+        self.assert_parsed(parser, "How do I get from Quick Stop Market to Fast Lane Plaza?", "Quick_Stop_Market", "Fast_Lane_Plaza", None)
+        self.assert_parsed(parser, "Route me from Green Point to Cheap Street", "Green_Point", "Cheap_Street", None)
+        self.assert_parsed(parser, "cheapest way from Fast Lane Plaza to Green Point", "Fast_Lane_Plaza", "Green_Point", "lowest_cost")
+        self.assert_parsed(parser, "fastest way from Cheap Street to Quick Stop Market", "Cheap_Street", "Quick_Stop_Market", "shortest_time")
+
+    def test_two_priorities_are_ambiguous(self):
+        intent, confidence = make_parser(DATASET_LOCATIONS).parse("cheapest and fastest way from Central park to NYU tandon")
+        self.assertIsNone(intent["preferences"]["priority"])
+        self.assertEqual(confidence, 0.5)
+
+    def test_unknown_places(self):
+        self.assertEqual(make_parser(DATASET_LOCATIONS).parse("cheapest way from Atlantis to El Dorado"), (None, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# Tests of the routing loop shared by demo.py (ModelRouter.route_sync) and service.py
+# (ModelRouter.route): both must escalate and count the same way.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics
+from model_router import ERROR, NULL_FIELD, UNKNOWN_PRIORITY, ModelRouter, validate_intent
+
+MODELS = ["small", "large"]
+
+
+def fake_ask(answers):
+    """
+    Returns an `ask(model, escalate)` giving each model's (answer, failure) from `answers`, raising for exceptions.
+    """
+    def ask(model, escalate):
+        answer = answers[model]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    return ask
+
+
+class ModelRouterTest(unittest.TestCase):
+    def route_both(self, answers):
+        """
+        Routes the same answers synchronously and asynchronously; returns [((answer, failure), router, metrics)] for each.
+        """
+        ask = fake_ask(answers)
+
+        async def ask_async(model, escalate):
+            return ask(model, escalate)
+
+        results = []
+        for route in ("sync", "async"):
+            metrics = Metrics(enabled=True)
+            router = ModelRouter(MODELS, metrics)
+            if route == "sync":
+                answer = router.route_sync(ask)
+            else:
+                answer = asyncio.run(router.route(ask_async, asyncio.Semaphore(1)))
+            results.append((answer, router, metrics))
+        return results
+
+    def test_small_model_answer_is_kept(self):
+        for answer, router, metrics in self.route_both({"small": ("small answer", None), "large": ("large answer", None)}):
+            self.assertEqual(answer, ("small answer", None))
+            self.assertEqual(router.stats()["escalations"], 0)
+            self.assertEqual(metrics.counters.get("escalations", 0), 0)
+
+    def test_rejected_answer_escalates(self):
+        for answer, router, metrics in self.route_both({"small": ("bad", NULL_FIELD), "large": ("large answer", None)}):
+            self.assertEqual(answer, ("large answer", None))
+            self.assertEqual(router.stats()["escalations"], 1)
+            self.assertEqual(router.stats()["models"]["small"]["failures"], {NULL_FIELD: 1})
+            self.assertEqual(metrics.counters["escalations"], 1)
+
+    def test_raised_call_escalates_and_is_counted(self):
+        for answer, router, metrics in self.route_both({"small": ConnectionError("not loaded"), "large": ("large answer", None)}):
+            self.assertEqual(answer, ("large answer", None))
+            self.assertEqual(router.stats()["models"]["small"]["failures"], {ERROR: 1})
+            self.assertEqual(metrics.counters["escalations"], 1)
+
+    def test_rejected_last_answer_is_returned_with_its_failure(self):
+        for answer, router, metrics in self.route_both({"small": ("bad", NULL_FIELD), "large": ("also bad", UNKNOWN_PRIORITY)}):
+            self.assertEqual(answer, ("also bad", UNKNOWN_PRIORITY))
+            self.assertEqual(router.stats()["models"]["large"]["failures"], {UNKNOWN_PRIORITY: 1})
+
+    def test_unknown_priority_is_rejected_unless_weighted(self):
+        def resolve(text):
+            return (text, 0.0)
+
+        intent = {"origin": "A", "destination": "B", "preferences": {"priority": "cheap"}}
+        self.assertEqual(validate_intent(json.dumps(intent), resolve, resolve), UNKNOWN_PRIORITY)
+        intent["preferences"]["priority"] = "lowest_cost"
+        self.assertIsNone(validate_intent(json.dumps(intent), resolve, resolve))
+        intent["preferences"] = {"priority": "cheap", "weights": {"time_cost": 1}}
+        self.assertIsNone(validate_intent(json.dumps(intent), resolve, resolve))
+
+    def test_last_model_error_is_raised(self):
+        router = ModelRouter(MODELS, Metrics(enabled=True))
+        with self.assertRaises(ConnectionError):
+            router.route_sync(fake_ask({"small": ("bad", NULL_FIELD), "large": ConnectionError("down")}))
+
+        async def ask(model, escalate):
+            raise ConnectionError("down")
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(router.route(ask))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# Tests of od_index.py and route_planner.py on travel_data.csv: the precomputed best
+# modes must equal sorting the DataFrame (ties included), and live updates must give
+# the same best modes and itineraries as an index rebuilt from the updated data.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import os
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd
+
+from od_index import PRIORITY_COLUMNS, ODIndex
+from route_planner import RoutePlanner
+
+# Pairs dropped for the itinerary tests, so that they need several legs
+REMOVED_PAIRS = [("Central_Park", "NYU_Tandon"), ("Brooklyn_Bridge", "Times_Square")]
+
+UPDATES = [
+    {"origin": "Central_Park", "destination": "Times_Square", "mode": "Drive", "time_cost": 1, "fare_cost": 0.5},
+    {"origin": "Central_Park", "destination": "Times_Square", "mode": "Citi_bike", "co2_cost": 9.0},
+    {"origin": "Times_Square", "destination": "NYU_Tandon", "mode": "Public_transit", "energy_cost": 5},
+    {"origin": "NYU_Tandon", "destination": "Brooklyn_Bridge", "mode": "Ride-hailing", "time_cost": 500},
+]
+
+
+def read_travel_data():
+    return pd.read_csv(os.path.join(REPO_ROOT, "travel_data.csv"))
+
+
+def expected_best_mode(df, origin, destination, priority):
+    """
+    The original lookup of the demos: filter the pair, then the smallest cost of the priority's column.
+    """
+    pair = df[(df["origin"] == origin) & (df["destination"] == destination)]
+    return pair.nsmallest(1, PRIORITY_COLUMNS[priority]).iloc[0].to_dict()
+
+
+def apply_to_frame(df, updates):
+    df = df.copy()
+    for update in updates:
+        rows = (df["origin"] == update["origin"]) & (df["destination"] == update["destination"]) & (df["mode"] == update["mode"])
+        for column, value in update.items():
+            if column not in ("origin", "destination", "mode"):
+                df.loc[rows, column] = value
+    return df
+
+
+def assert_best_modes_match_frame(test, index, df):
+    """
+    Checks the best mode of every OD pair of `df` and every priority against `expected_best_mode`.
+    """
+    pairs = df[["origin", "destination"]].drop_duplicates().itertuples(index=False)
+    for origin, destination in pairs:
+        for priority in PRIORITY_COLUMNS:
+            with test.subTest(origin=origin, destination=destination, priority=priority):
+                test.assertEqual(index.best_mode(origin, destination, priority), expected_best_mode(df, origin, destination, priority))
+
+
+class ODIndexTest(unittest.TestCase):
+    def test_best_mode_matches_sorting(self):
+        df = read_travel_data()
+        assert_best_modes_match_frame(self, ODIndex(df), df)
+
+    def test_ties_go_to_the_first_row(self):
+        # Coarser costs make most pairs tie on every priority
+        df = read_travel_data()
+        df["time_cost"] = df["time_cost"] // 20 * 20
+        df["fare_cost"] = df["fare_cost"].round(-1)
+        df["co2_cost"] = (df["co2_cost"] > 5).astype(float)
+        df["energy_cost"] = df["energy_cost"] // 1000
+        assert_best_modes_match_frame(self, ODIndex(df), df)
+
+    def test_unknown_pair_or_priority(self):
+        index = ODIndex(read_travel_data())
+        self.assertIsNone(index.best_mode("Central_Park", "Nowhere", "lowest_cost"))
+        self.assertIsNone(index.best_mode("Central_Park", "Times_Square", "cheap"))
+
+
+class LiveUpdateTest(unittest.TestCase):
+    def setUp(self):
+        df = read_travel_data()
+        for origin, destination in REMOVED_PAIRS:
+            df = df[(df["origin"] != origin) | (df["destination"] != destination)]
+        self.df = df.reset_index(drop=True)
+
+    def plans(self, planner):
+        locations = planner.nodes
+        return {
+            (origin, destination, priority): planner.plan(origin, destination, priority)
+            for origin in locations for destination in locations if origin != destination
+            for priority in PRIORITY_COLUMNS
+        }
+
+    def test_updates_match_a_rebuilt_index(self):
+        index = ODIndex(self.df)
+        planner = RoutePlanner(index)
+        # Build every graph first, so the updates go through the planner's edge refresh
+        plans_before = self.plans(planner)
+
+        applied, rejected = index.apply_updates(UPDATES)
+        self.assertEqual((applied, rejected), (len(UPDATES), []))
+        updated_df = apply_to_frame(self.df, UPDATES)
+        rebuilt = ODIndex(updated_df)
+
+        assert_best_modes_match_frame(self, index, updated_df)
+        assert_best_modes_match_frame(self, rebuilt, updated_df)
+        plans_after = self.plans(planner)
+        self.assertEqual(plans_after, self.plans(RoutePlanner(rebuilt)))
+        self.assertNotEqual(plans_after, plans_before)
+        self.assertEqual(len(plans_after[("Central_Park", "NYU_Tandon", "shortest_time")]["legs"]), 2)
+
+    def test_unknown_rows_are_rejected(self):
+        index = ODIndex(self.df)
+        update = {"origin": "Central_Park", "destination": "Times_Square", "mode": "Helicopter", "time_cost": 1}
+        self.assertEqual(index.apply_updates([update]), (0, [update]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# Tests of scoring.py: weighted ranking and the Pareto front of the modes of an OD
+# pair, on travel_data.csv, including a live update racing a ranking.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import os
+import sys
+import threading
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd
+
+from od_index import ODIndex
+from scoring import MultiCriteriaScorer
+
+ORIGIN, DESTINATION = "Central_Park", "Times_Square"
+
+
+class ScoringTest(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(REPO_ROOT, "travel_data.csv"))
+        self.index = ODIndex(self.df)
+        self.scorer = MultiCriteriaScorer(self.index)
+        pair = self.df[(self.df["origin"] == ORIGIN) & (self.df["destination"] == DESTINATION)]
+        self.rows = {row["mode"]: row for row in pair.to_dict("records")}
+
+    def test_rank_by_a_single_cost_matches_sorting(self):
+        ranked = self.scorer.rank(ORIGIN, DESTINATION, {"time_cost": 1}, top_k=len(self.rows))
+        expected = sorted(self.rows.values(), key=lambda row: row["time_cost"])
+        self.assertEqual([record["mode"] for record in ranked], [row["mode"] for row in expected])
+
+    def test_pareto_front_has_every_single_cost_winner(self):
+        front = {record["mode"] for record in self.scorer.pareto_front(ORIGIN, DESTINATION)}
+        for column in ["time_cost", "fare_cost", "co2_cost", "energy_cost"]:
+            self.assertIn(min(self.rows.values(), key=lambda row: row[column])["mode"], front)
+
+    def test_update_racing_a_ranking_is_not_half_seen(self):
+        read_pair_costs = self.index.pair_costs
+        updates = []
+
+        def pair_costs_then_update(origin, destination):
+            pair = read_pair_costs(origin, destination)
+            # An update arriving between the read of the costs and the read of the rows: it must wait
+            update = threading.Thread(
+                target=self.index.apply_updates,
+                args=([{"origin": ORIGIN, "destination": DESTINATION, "mode": "Drive", "time_cost": 500}],),
+            )
+            update.start()
+            update.join(0.2)
+            updates.append(update)
+            return pair
+
+        self.index.pair_costs = pair_costs_then_update
+        ranked = self.scorer.rank(ORIGIN, DESTINATION, {"time_cost": 1}, top_k=len(self.rows))
+        updates[0].join()
+
+        for record in ranked:
+            self.assertEqual(record["time_cost"], self.rows[record["mode"]]["time_cost"])
+        # The update did land afterwards
+        del self.index.pair_costs
+        self.assertEqual(self.scorer.rank(ORIGIN, DESTINATION, {"time_cost": 1}, top_k=len(self.rows))[-1]["mode"], "Drive")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# End-to-end tests of service.py against lmstudio_stub.py standing in for LM Studio.
+# Both servers run on free ports in a background event loop; requests are plain HTTP.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import demo
+from intent_cache import IntentCache
+from lmstudio_stub import start_stub
+from service import start_service
+
+# Stub latency: long enough for a second request to arrive while the first is in flight
+LLM_LATENCY = 0.5
+
+
+def post(url, body):
+    """
+    POSTs raw bytes and returns (status, decoded JSON answer).
+    """
+    request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class ServiceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        demo.path = REPO_ROOT + os.sep
+        demo.LIVE_UPDATES = False
+        demo.od_index = None
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+
+        stub_server, _ = cls.run_async(start_stub(port=0, latency=LLM_LATENCY))
+        llm_url = f"http://127.0.0.1:{stub_server.sockets[0].getsockname()[1]}/v1"
+        server, cls.service = cls.run_async(start_service(port=0, llm_url=llm_url, models=["stub-model"], max_pending=1))
+        cls.url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/recommend"
+        cls.servers = [stub_server, server]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.run_async(cls.shutdown())
+        cls.service.lookups.shutdown()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+
+    @classmethod
+    async def shutdown(cls):
+        """
+        Closes both servers and the LLM client, then waits for the connections still being served to end.
+        """
+        for server in cls.servers:
+            server.close()
+        # Closing the client's pooled connections lets the stub's connection handlers return
+        await cls.service.client.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=10)
+        for server in cls.servers:
+            await server.wait_closed()
+
+    @classmethod
+    def run_async(cls, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, cls.loop).result(timeout=60)
+
+    def setUp(self):
+        demo.intent_cache = IntentCache()
+
+    def test_recommend_structured_request(self):
+        body = {"origin": "Central park", "destination": "NYU tandon", "preferences": {"priority": "lowest_cost"}}
+        status, answer = post(self.url, json.dumps(body).encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(answer["status"], "success")
+        self.assertEqual(answer["mode"]["origin"], "Central_Park")
+        self.assertEqual(answer["mode"]["destination"], "NYU_Tandon")
+
+    def test_recommend_query_through_llm(self):
+        # No priority word, so the fast path leaves this query to the (stub) LLM
+        status, answer = post(self.url, json.dumps({"query": "How do I get from Central Park to NYU Tandon?"}).encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(answer["status"], "success")
+        self.assertEqual(answer["intent"]["origin"], "Central Park")
+
+    def test_non_object_body_is_rejected(self):
+        status, answer = post(self.url, b"[1, 2, 3]")
+        self.assertEqual(status, 400)
+        self.assertEqual(answer["status"], "error")
+
+        status, _ = post(self.url, b"not json")
+        self.assertEqual(status, 400)
+
+    def test_busy_past_max_pending(self):
+        rejected = self.service.rejected
+        body = json.dumps({"query": "Can you route me from Times Square to Brooklyn Bridge?"}).encode()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            slow = pool.submit(post, self.url, body)
+            # Wait until the first request holds the only pending slot
+            while self.service.pending == 0 and not slow.done():
+                time.sleep(0.005)
+            status, answer = post(self.url, body)
+            self.assertEqual(slow.result()[0], 200)
+        self.assertEqual(status, 503)
+        self.assertEqual(answer["status"], "error")
+        self.assertEqual(self.service.rejected, rejected + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
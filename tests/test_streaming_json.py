@@ -0,0 +1,141 @@
+# Tests of streaming_json.py and of the intent demo.stream_intent builds from its
+# events: whatever the chunking (even inside strings and escapes), the streamed values
+# must equal `json.loads` of the same text. The LLM is lmstudio_stub.py in a background loop.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import demo
+from lmstudio_stub import start_stub
+from streaming_json import OBJECT_END, StreamingJSONParser
+
+PREFERENCES = {
+    "priority": None,
+    "weights": {"time_cost": 2, "fare_cost": 0.5},
+    "top_k": 2,
+    "avoid": ["Drive", "Ride-hailing"],
+    "legs": [[1, 2], [], {"note": "a \"quoted\" \\ path"}],
+    "extra": {},
+}
+
+
+def rebuild(text, chunk_size):
+    """
+    Feeds the text in chunks of `chunk_size` characters and rebuilds the object from the reported events.
+    """
+    parser = StreamingJSONParser(report_object_ends=True, report_containers=True)
+    value = {}
+    for start in range(0, len(text), chunk_size):
+        for path, item in parser.feed(text[start:start + chunk_size]):
+            if item is not OBJECT_END:
+                demo._set_path(value, path, item)
+    return value
+
+
+def scalar_events(chunks):
+    """
+    Feeds the chunks to a plain parser and returns every reported (path, value).
+    """
+    parser = StreamingJSONParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+class StreamingJSONParserTest(unittest.TestCase):
+    TEXT = (
+        'Sure: ```json\n{"origin": "Caf\\u00e9 \\"Le Bon\\" \\\\ 5th", "destination": "NYU\\nTandon", '
+        '"preferences": {"priority": null, "top_k": 12, "weights": {"time_cost": -1.5e2, "fare_cost": true}}}```'
+    )
+    EXPECTED = [
+        (("origin",), 'Caf\u00e9 "Le Bon" \\ 5th'),
+        (("destination",), "NYU\nTandon"),
+        (("preferences", "priority"), None),
+        (("preferences", "top_k"), 12),
+        (("preferences", "weights", "time_cost"), -150.0),
+        (("preferences", "weights", "fare_cost"), True),
+    ]
+
+    def test_whole_text(self):
+        self.assertEqual(scalar_events([self.TEXT]), self.EXPECTED)
+
+    def test_every_split_point(self):
+        # Splits inside strings, right after a backslash, inside \u escapes and inside numbers and literals
+        for split in range(len(self.TEXT) + 1):
+            with self.subTest(split=split):
+                self.assertEqual(scalar_events([self.TEXT[:split], self.TEXT[split:]]), self.EXPECTED)
+
+    def test_one_character_at_a_time(self):
+        self.assertEqual(scalar_events(list(self.TEXT)), self.EXPECTED)
+
+    def test_text_after_the_object_is_ignored(self):
+        parser = StreamingJSONParser()
+        self.assertEqual(parser.feed('{"origin": "A"} trailing {"origin": "B"}'), [(("origin",), "A")])
+        self.assertTrue(parser.done)
+
+    def test_malformed_json_raises(self):
+        with self.assertRaises(ValueError):
+            scalar_events(['{"origin": "A", @}'])
+
+
+class StreamingJSONRebuildTest(unittest.TestCase):
+    def test_nested_arrays_and_objects_equal_json_loads(self):
+        text = json.dumps({"origin": "Central Park", "destination": "NYU Tandon", "preferences": PREFERENCES})
+        for chunk_size in (1, 2, 3, 4, 7, len(text)):
+            self.assertEqual(rebuild(text, chunk_size), json.loads(text))
+
+
+class StreamIntentTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        demo.path = REPO_ROOT + os.sep
+        demo.LIVE_UPDATES = False
+        demo.od_index = None
+        cls.loop = asyncio.new_event_loop()
+        cls.server, cls.stub = cls.loop.run_until_complete(start_stub(port=0))
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        cls.llm_url = demo.LM_STUDIO_URL
+        demo.LM_STUDIO_URL = f"http://127.0.0.1:{cls.server.sockets[0].getsockname()[1]}/v1"
+        demo.client = None
+        demo.load_data()
+
+    @classmethod
+    def tearDownClass(cls):
+        demo.client.close()
+        demo.client = None
+        demo.LM_STUDIO_URL = cls.llm_url
+        cls.server.close()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+
+    def tearDown(self):
+        self.stub.__dict__.pop("intent", None)
+
+    def test_streamed_preferences_equal_json_loads(self):
+        def intent_with_preferences(query, null_rate=0.0):
+            intent = type(self.stub).intent(self.stub, query)
+            intent["preferences"] = json.loads(json.dumps(PREFERENCES))
+            return intent
+
+        self.stub.intent = intent_with_preferences
+        (intent, llm_content), failure = demo.stream_intent("How do I get from Central Park to NYU Tandon?", demo.MODEL)
+        self.assertIsNone(failure)
+        self.assertEqual(intent["preferences"], PREFERENCES)
+        self.assertEqual(intent["origin"], "Central Park")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# Tests of travel_store.py: a CSV compiled into a store must load back as the same
+# data, and the OD index mapped from the store must answer like one built from the CSV.
+#
+# Usage: python -m pytest tests   (or python -m unittest discover tests)
+
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd
+
+from od_index import COST_COLUMNS, PRIORITY_COLUMNS, ODIndex
+from travel_store import convert_csv, load_od_index, load_travel_data
+
+
+class TravelStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.directory, "travel_data.csv")
+        shutil.copy(os.path.join(REPO_ROOT, "travel_data.csv"), self.csv_path)
+        self.expected_df = pd.read_csv(self.csv_path)
+        self.expected = ODIndex(self.expected_df)
+        self.rows = convert_csv(self.csv_path, os.path.join(self.directory, "travel_data.store"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_store_loads_the_same_data(self):
+        df = load_travel_data(self.csv_path)
+        self.assertEqual(self.rows, len(self.expected_df))
+        for column in ["origin", "destination", "mode"]:
+            self.assertEqual(df[column].astype(str).tolist(), self.expected_df[column].tolist())
+        for column in COST_COLUMNS:
+            pd.testing.assert_series_equal(df[column], self.expected_df[column], check_dtype=False, rtol=1e-6)
+
+    def test_mapped_index_answers_like_a_built_one(self):
+        index = load_od_index(self.csv_path, load_travel_data(self.csv_path))
+        self.assertEqual(len(index), len(self.expected))
+        self.assertEqual(index.origins, self.expected.origins)
+        self.assertEqual(index.destinations, self.expected.destinations)
+        for origin in index.origins:
+            for destination in index.destinations:
+                for priority in PRIORITY_COLUMNS:
+                    self.assertEqual(index.best_mode(origin, destination, priority), self.expected.best_mode(origin, destination, priority))
+                if (origin, destination) in self.expected:
+                    positions, costs = index.pair_costs(origin, destination)
+                    self.assertEqual(index.records(positions), self.expected.records(self.expected.pair_costs(origin, destination)[0]))
+
+    def test_updates_leave_the_store_untouched(self):
+        index = load_od_index(self.csv_path, load_travel_data(self.csv_path))
+        update = {"origin": "Central_Park", "destination": "Times_Square", "mode": "Drive", "time_cost": 1}
+        self.assertEqual(index.apply_updates([update]), (1, []))
+        self.assertEqual(index.best_mode("Central_Park", "Times_Square", "shortest_time")["mode"], "Drive")
+
+        reloaded = load_od_index(self.csv_path, load_travel_data(self.csv_path))
+        self.assertEqual(
+            reloaded.best_mode("Central_Park", "Times_Square", "shortest_time"),
+            self.expected.best_mode("Central_Park", "Times_Square", "shortest_time"),
+        )
+
+    def test_stale_store_falls_back_to_the_csv(self):
+        # A CSV newer than its store is read directly
+        meta_time = os.path.getmtime(os.path.join(self.directory, "travel_data.store", "meta.json"))
+        os.utime(self.csv_path, (meta_time + 10, meta_time + 10))
+        df = load_travel_data(self.csv_path)
+        pd.testing.assert_frame_equal(df, self.expected_df)
+        self.assertIsInstance(load_od_index(self.csv_path, df), ODIndex)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+# This file implements a compiled, columnar on-disk format for the travel dataset.
+# Locations and modes are dictionary-encoded as small integer codes and the costs
+# are stored as int32/float32 columns. Each column is a raw binary file that is
+# memory-mapped when loaded, so startup does not parse anything and the pages are
+# shared by every process reading the same store. The OD index built from the data
+# (rows grouped by pair, best modes per priority) is saved in the store too and
+# mapped the same way, so a process does not rebuild it at startup.
+#
+# Usage: python travel_store.py travel_data.csv [travel_data.store]
+
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from od_index import INDEX_META, ODIndex
+
+STORE_VERSION = 1
+LOCATION_COLUMNS = ["origin", "destination"]
+COLUMNS = ["origin", "destination", "mode", "time_cost", "fare_cost", "co2_cost", "energy_cost"]
+# Subdirectory of the store holding the saved OD index
+INDEX_DIR = "index"
+
+
+def code_dtype(n_categories):
+    """
+    Smallest signed integer type for category codes (the same choice pandas makes for Categoricals).
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _encode(values, vocabulary):
+    """
+    Returns int32 codes of the values, adding the unseen ones to the vocabulary (a dict).
+    """
+    for value in pd.unique(values):
+        vocabulary.setdefault(value, len(vocabulary))
+    return pd.Index(list(vocabulary)).get_indexer(values).astype(np.int32)
+
+
+def convert_csv(csv_path, store_path, chunksize=1_000_000):
+    """
+    Compiles the CSV dataset into a store directory, reading it chunk by chunk.
+    Integer cost columns are stored as int32 and the other costs as float32, and the OD index
+    of the data is saved with them. Returns the number of rows.
+    """
+    os.makedirs(store_path, exist_ok=True)
+    locations, modes = {}, {}
+    dtypes = {}
+    files = {}
+    rows = 0
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            if not dtypes:
+                dtypes = {column: "int32" if pd.api.types.is_integer_dtype(chunk[column]) else "float32" for column in COLUMNS[3:]}
+                files = {column: open(os.path.join(store_path, f"{column}.bin"), "wb") for column in COLUMNS}
+
+            for column in LOCATION_COLUMNS:
+                _encode(chunk[column], locations).tofile(files[column])
+            _encode(chunk["mode"], modes).tofile(files["mode"])
+            for column, dtype in dtypes.items():
+                if dtype == "int32" and not pd.api.types.is_integer_dtype(chunk[column]):
+                    raise ValueError(f"Column {column} has non-integer values after row {rows}.")
+                chunk[column].to_numpy().astype(dtype).tofile(files[column])
+            rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    # Shrink the int32 codes to the type pandas uses for that many categories
+    code_dtypes = {}
+    for column, vocabulary in [("origin", locations), ("destination", locations), ("mode", modes)]:
+        code_dtypes[column] = code_dtype(len(vocabulary)).name
+        file_path = os.path.join(store_path, f"{column}.bin")
+        np.fromfile(file_path, dtype=np.int32).astype(code_dtypes[column]).tofile(file_path)
+
+    meta = {
+        "version": STORE_VERSION,
+        "rows": rows,
+        "dtypes": {**code_dtypes, **dtypes},
+        "locations": list(locations),
+        "modes": list(modes),
+    }
+    with open(os.path.join(store_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    if rows:
+        ODIndex(TravelStore(store_path).to_frame()).save(os.path.join(store_path, INDEX_DIR))
+    return rows
+
+
+class TravelStore:
+    """
+    A compiled travel dataset, with every column memory-mapped read-only.
+    """
+
+    def __init__(self, store_path):
+        with open(os.path.join(store_path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != STORE_VERSION:
+            raise ValueError(f"Unsupported travel store version {meta['version']}.")
+
+        self.path = store_path
+        self.rows = meta["rows"]
+        self.locations = meta["locations"]
+        self.modes = meta["modes"]
+        self.columns = {
+            column: np.memmap(os.path.join(store_path, f"{column}.bin"), dtype=meta["dtypes"][column], mode="r", shape=(self.rows,))
+            if self.rows else np.empty(0, dtype=meta["dtypes"][column])
+            for column in COLUMNS
+        }
+
+    def __len__(self):
+        return self.rows
+
+    def to_frame(self):
+        """
+        Returns the dataset as a DataFrame with categorical location/mode columns, backed by the mapped files.
+        """
+        locations = pd.Index(self.locations)
+        data = {
+            "origin": pd.Categorical.from_codes(self.columns["origin"], categories=locations),
+            "destination": pd.Categorical.from_codes(self.columns["destination"], categories=locations),
+            "mode": pd.Categorical.from_codes(self.columns["mode"], categories=pd.Index(self.modes)),
+        }
+        for column in COLUMNS[3:]:
+            data[column] = self.columns[column]
+        return pd.DataFrame(data, columns=COLUMNS, copy=False)
+
+
+def _current_store(csv_path):
+    """
+    Returns the path of the compiled store next to the CSV (`travel_data.store` for `travel_data.csv`)
+    if it exists and is up to date, or None.
+    """
+    store_path = os.path.splitext(csv_path)[0] + ".store"
+    meta_path = os.path.join(store_path, "meta.json")
+    if os.path.exists(meta_path) and (not os.path.exists(csv_path) or os.path.getmtime(meta_path) >= os.path.getmtime(csv_path)):
+        return store_path
+    return None
+
+
+def load_travel_data(csv_path):
+    """
+    Loads the dataset from its compiled store when it exists and is up to date, and from the CSV otherwise.
+    """
+    store_path = _current_store(csv_path)
+    if store_path is not None:
+        return TravelStore(store_path).to_frame()
+    return pd.read_csv(csv_path)
+
+
+def load_od_index(csv_path, df):
+    """
+    Returns the OD index of the dataset: mapped from the compiled store when it holds a saved index,
+    built from `df` (as returned by `load_travel_data`) otherwise.
+    """
+    store_path = _current_store(csv_path)
+    if store_path is not None:
+        index_path = os.path.join(store_path, INDEX_DIR)
+        if os.path.exists(os.path.join(index_path, INDEX_META)):
+            return ODIndex.load(index_path)
+    return ODIndex(df)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python travel_store.py travel_data.csv [travel_data.store]")
+        sys.exit(1)
+
+    csv_path = sys.argv[1]
+    store_path = sys.argv[2] if len(sys.argv) == 3 else os.path.splitext(csv_path)[0] + ".store"
+    rows = convert_csv(csv_path, store_path)
+    print(f"Compiled {rows} rows from '{csv_path}' into '{store_path}'.")